@@ -0,0 +1,6 @@
+import sys
+from helpers.cli import main
+
+# Same as `python tracker.py batch`
+if __name__ == "__main__":
+    sys.exit(main(["batch"] + sys.argv[1:]))
@@ -0,0 +1,51 @@
+import sys
+import json
+import argparse
+
+METRICS = ["seconds", "peak_mb", "calls", "cells"]
+
+
+def compare(baseline, candidate, tolerance=0.10):
+    """Lines comparing two saved benchmark runs, and whether the candidate regressed.
+
+    A metric regresses when the candidate is more than `tolerance` (a fraction)
+    above the baseline at the same scale and scenario.
+    """
+    lines, regressed = [], False
+    base_scales = {s["years"]: s for s in baseline["scales"]}
+    for scale in candidate["scales"]:
+        base = base_scales.get(scale["years"])
+        if base is None:
+            lines.append(f"{scale['years']:>5g}y  (no baseline at this scale)")
+            continue
+        for scenario in ("full", "incremental"):
+            cells = []
+            for metric in METRICS:
+                old, new = base[scenario][metric], scale[scenario][metric]
+                ratio = new / old if old else (1.0 if new == old else float("inf"))
+                flag = ""
+                if ratio > 1 + tolerance:
+                    flag, regressed = " ⚠️", True
+                cells.append(f"{metric} {old:g} → {new:g} ({ratio:.2f}x){flag}")
+            lines.append(f"{scale['years']:>5g}y {scenario:<11} " + " | ".join(cells))
+    return lines, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare a candidate benchmark run against a baseline.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before flagging (default 0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    lines, regressed = compare(baseline, candidate, args.tolerance)
+    print("\n".join(lines))
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+
+# Quiet by default: debug output would dominate the timings
+os.environ.setdefault("VERBOSE", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers.backend import MemoryBackend
+from helpers.session import Session
+from helpers.quota import set_read_quota
+from helpers.trace import tracer
+from benchmarks.synthetic import Tracker, config
+from helpers.stages.pipeline import run_pipeline
+
+
+def _measure(tracker, settings, memory=False):
+    """Run the whole pipeline once against the tracker's in-memory workbooks.
+
+    With memory=True the run is traced with tracemalloc for its peak allocation,
+    which slows it down, so its wall time is not comparable with untraced runs.
+    """
+    backend = MemoryBackend(tracker.workbooks)
+    backend.count_bytes = True
+    tracer.reset()
+    tracer.attach(backend)
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        run_pipeline(Session(backend), settings)
+    seconds = time.perf_counter() - start
+    peak = 0
+    if memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    usage = backend.report()
+    return {
+        "seconds": round(seconds, 4),
+        "peak_mb": round(peak / 2 ** 20, 2),
+        "calls": sum(usage["calls"].values()),
+        "cells": sum(usage["cells"].values()),
+        "bytes": sum(usage["bytes"].values()),
+        "stages": {s["name"]: s["seconds"] for s in tracer.spans if "/" not in s["name"]},
+    }
+
+
+def run_scale(years, foods, seed, repeat):
+    """Benchmark one tracker size: a full first run, then an incremental run after one more day.
+
+    Each scenario is timed `repeat` times on a fresh copy of the data, keeping the
+    fastest run, then run once more under tracemalloc for its peak memory.
+    """
+    results = {}
+    for scenario in ("full", "incremental"):
+        runs = []
+        for attempt in range(repeat + 1):
+            tracker = Tracker(int(years * 365), foods=foods, seed=seed)
+            with tempfile.TemporaryDirectory() as state_dir:
+                os.environ["STATE_DIR"] = state_dir
+                if scenario == "incremental":
+                    # yesterday's run leaves its state behind; today adds one day of entries
+                    _measure(tracker, dict(config(), INCREMENTAL="1"))
+                    tracker.add_day(master=False)
+                settings = dict(config(), INCREMENTAL="1" if scenario == "incremental" else "0")
+                runs.append(_measure(tracker, settings, memory=attempt == repeat))
+        results[scenario] = dict(min(runs[:-1], key=lambda r: r["seconds"]), peak_mb=runs[-1]["peak_mb"])
+    rows = len(Tracker(int(years * 365), foods=foods, seed=seed).workbooks["food_log"]["Food Log"]) - 1
+    return {"years": years, "food_log_rows": rows, **results}
+
+
+def _positive(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"should be at least 1, got {value}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the pipeline on synthetic trackers of growing size.")
+    parser.add_argument("--years", default="0.5,1,3", help="comma-separated tracker sizes in years (default 0.5,1,3)")
+    parser.add_argument("--foods", type=int, default=300, help="Food Data catalogue size (default 300)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=_positive, default=3, help="runs per scenario, fastest kept (default 3)")
+    parser.add_argument("--out", help="save the results as JSON (e.g. benchmarks/results/baseline.json)")
+    args = parser.parse_args(argv)
+    # The in-memory sheets have no read quota, so the limiter must not pace the repeated runs
+    set_read_quota(1000000)
+
+    results = {"foods": args.foods, "seed": args.seed, "scales": []}
+    for years in [float(y) for y in args.years.split(",")]:
+        scale = run_scale(years, args.foods, args.seed, args.repeat)
+        results["scales"].append(scale)
+        for scenario in ("full", "incremental"):
+            r = scale[scenario]
+            print(f"{years:>5g}y {scale['food_log_rows']:>7} rows {scenario:<11} {r['seconds']:>8.3f}s "
+                  f"{r['peak_mb']:>8.1f} MB {r['calls']:>4} calls {r['cells']:>8} cells")
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📈 Results saved to {args.out}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
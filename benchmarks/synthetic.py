@@ -0,0 +1,107 @@
+import random
+import datetime
+
+FOOD_DATA_HEADER = ["ID", "Food", "Alias", "Unit", "Per Unit", "Kcal", "Protein g", "Carb g", "Fat g",
+                    "Saturated Fat g", "Fibre g", "Sugar g"]
+FOOD_LOG_HEADER = ["Date", "Food", "Manual Input", "Unit", "Conversion", "Value", "Kcal", "P", "C", "F",
+                   "Food_Data_ID", "Notes", "Saturated Fat g", "Fibre g", "Sugar g"]
+MASTER_HEADER = ["ID", "Date", "Phase", "Kcal", "Protein (g)", "Carb (g)", "Fat (g)", "Sat Fat (g)",
+                 "Fibre (g)", "Sugar (g)", "Notes"]
+ACTIVITY_HEADER = ["Date", "Menstruation", "Steps", "Load-bearing", "Bedtime", "Wake-up time", "Poop time"]
+
+# Workbook url and worksheet title of each table, as handed to the stages' config
+SHEETS = {
+    "FOOD_DATA": ("food_data", "Food Data"),
+    "FOOD_LOG": ("food_log", "Food Log"),
+    "MASTER_TABLE": ("master", "Master"),
+    "ACTIVITY_LOG": ("activity", "Activities"),
+    "TACTICAL_DB": ("tactical", "DB"),
+}
+START = datetime.date(2021, 1, 1)
+
+
+def config():
+    """Stage config pointing at the synthetic workbooks."""
+    values = {"ENV_NAME": "benchmark"}
+    for key, (url, sheet) in SHEETS.items():
+        values[f"{key}_URL"] = url
+        values[f"{key}_URL_SHEET"] = sheet
+    return values
+
+
+def _number(rng, low, high, digits=1):
+    return str(round(rng.uniform(low, high), digits))
+
+
+def _food_data(rng, foods):
+    rows = [FOOD_DATA_HEADER]
+    for i in range(1, foods + 1):
+        rows.append([
+            str(i), f"Food {i}", f"alias {i}" if rng.random() < 0.6 else "", rng.choice(["g", "ml", "slice"]),
+            rng.choice(["100", "1"]), _number(rng, 20, 600), _number(rng, 0, 30), _number(rng, 0, 80),
+            _number(rng, 0, 40), rng.choice(["", _number(rng, 0, 10)]), rng.choice(["", "2"]), _number(rng, 0, 20),
+        ])
+    return rows
+
+
+def _log_rows(rng, day, foods):
+    """A day's Food Log: looked-up foods, some cooked-weight conversions, manual rows and the odd blank."""
+    rows = []
+    for _ in range(rng.randint(3, 7)):
+        roll = rng.random()
+        if roll < 0.1:
+            rows.append([day, "Restaurant", "Y", "", "", "", str(rng.randint(200, 900)), str(rng.randint(5, 40)),
+                         str(rng.randint(10, 90)), str(rng.randint(5, 40)), "", "", str(rng.randint(0, 9)),
+                         rng.choice(["", "3"]), str(rng.randint(0, 20))])
+            continue
+        food_id = rng.randint(1, foods)
+        # (an invalid Value would abort the nutrition stage's shifted-row check, so only blanks)
+        value = "" if roll < 0.13 else rng.choice(["30", "50", "100", "1", "2", "250"])
+        conversion = rng.choice(["", "", "", "", "0.25", "0.4"])
+        name = f"alias {food_id}" if rng.random() < 0.3 else f"Food {food_id}"
+        rows.append([day, name, "N", "g", conversion, value, "", "", "", "", str(food_id), "", "", "", ""])
+    return rows
+
+
+def _activity_row(rng, day, menstruating):
+    return [
+        day, "Y" if menstruating else "", rng.choice(["8.5k", "10k", "12.3k", "6000", "7200", ""]),
+        rng.choice(["✅", "y", "", "hip mobility", "N"]),
+        rng.choice(["22:30", "23:15", "midnight", "10:45", "00:30", "21:50", ""]),
+        rng.choice(["07:00", "06:45", "08:10", "07:30", ""]), rng.choice(["-", "08:00", "09:15"]),
+    ]
+
+
+class Tracker:
+    """One person's synthetic tracker, growing a day at a time."""
+
+    def __init__(self, days, foods=300, seed=1):
+        self.rng = random.Random(seed)
+        self.foods = foods
+        self.days = 0
+        self.cycle_day, self.cycle_length, self.period = 0, 28, 5
+        self.workbooks = {
+            "food_data": {"Food Data": _food_data(self.rng, foods)},
+            "food_log": {"Food Log": [FOOD_LOG_HEADER]},
+            "master": {"Master": [MASTER_HEADER]},
+            "activity": {"Activities": [ACTIVITY_HEADER]},
+            "tactical": {"DB": []},
+        }
+        for _ in range(days):
+            self.add_day()
+
+    def add_day(self, master=True):
+        """Log one more day: Food Log entries, an Activity row and (optionally) its master-table row."""
+        day = (START + datetime.timedelta(days=self.days)).strftime("%d/%m/%Y")
+        self.days += 1
+        if self.cycle_day == self.cycle_length:
+            self.cycle_day = 0
+            self.cycle_length, self.period = self.rng.randint(26, 32), self.rng.randint(4, 6)
+        menstruating = self.cycle_day < self.period
+        self.cycle_day += 1
+
+        self.workbooks["food_log"]["Food Log"].extend(_log_rows(self.rng, day, self.foods))
+        self.workbooks["activity"]["Activities"].append(_activity_row(self.rng, day, menstruating))
+        if master:
+            self.workbooks["master"]["Master"].append([str(self.days), day, ""] + ["0"] * 7 + [""])
+        return day
@@ -0,0 +1,78 @@
+import re
+import numpy as np
+import pandas as pd
+
+# "H:MM" or "HH:MM", as pd.to_datetime(format="%H:%M") accepts them
+CLOCK = re.compile(r"^(2[0-3]|[01]\d|\d):([0-5]\d|\d)$")
+DAY = 24 * 60
+# Bedtimes logged as 8-11 mean pm; before 6 am the night belongs to the next calendar day
+PM_HOURS = (8, 11)
+NEXT_DAY_BEFORE = 6 * 60
+# Bedtime_clean is OK from 20:00 up to midnight included
+BEDTIME_FROM = 20 * 60
+
+# Hours of sleep a night that Sleep_debt_7d counts against, and the days the rolling metrics span
+SLEEP_TARGET_HOURS = 8
+ROLLING_DAYS = 7
+
+
+def clock_minutes(values):
+    """Minutes after midnight of "HH:MM" cells as float64 (NaN for blanks and anything else)."""
+    text = values.where(values.notna(), "").astype(str)
+    parts = text.str.extract(CLOCK).astype(np.float64)
+    return (parts[0] * 60 + parts[1]).to_numpy()
+
+
+def format_clock(minutes, index=None):
+    """"HH:MM" text for minutes after midnight (NaN stays NaN)."""
+    hours, mins = np.divmod(np.nan_to_num(minutes).astype(np.int64), 60)
+    text = pd.Series(hours, index=index).astype(str).str.zfill(2) + ":" + pd.Series(mins, index=index).astype(str).str.zfill(2)
+    return text.where(~np.isnan(minutes), np.nan)
+
+
+def add_sleep_features(merged):
+    """Clean Bedtime and Wake-up time and add Bedtime_clean and Sleep_duration, all from one parse.
+
+    Bedtime "midnight" is 00:00 and 8-11 means pm. Bedtime_clean is OK from 20:00
+    to midnight, Not OK otherwise, No Data when blank. Sleep_duration (hours, 1
+    decimal) runs from a row's bedtime to the next row's wake-up time, a bedtime
+    before 6 am falling on the day after the row's Date. merged["Date"] must
+    still be datetime64.
+    """
+    bed = clock_minutes(merged["Bedtime"].replace("midnight", "00:00"))
+    pm = (bed >= PM_HOURS[0] * 60) & (bed < (PM_HOURS[1] + 1) * 60)
+    bed = np.where(pm, bed + 12 * 60, bed)
+    clean = np.where(np.isnan(bed), "No Data", np.where((bed >= BEDTIME_FROM) | (bed == 0), "OK", "Not OK"))
+    merged["Bedtime"] = format_clock(bed, merged.index)
+    merged["Bedtime_clean"] = clean
+
+    wake = clock_minutes(merged["Wake-up time"])
+    merged["Wake-up time"] = format_clock(wake, merged.index)
+
+    # Minutes since the epoch: day number * 1440 + time of day
+    dates = merged["Date"].to_numpy(dtype="datetime64[ns]")
+    days = np.where(np.isnat(dates), np.nan, dates.astype("datetime64[D]").astype(np.int64).astype(np.float64))
+    bed_at = days * DAY + bed + np.where(bed < NEXT_DAY_BEFORE, DAY, 0)
+    wake_at = days * DAY + wake
+    next_wake = np.append(wake_at[1:], np.nan)
+    # (seconds / 3600 rather than minutes / 60, as timedelta.total_seconds() gave it)
+    merged["Sleep_duration"] = pd.Series((next_wake - bed_at) * 60 / 3600, index=merged.index).round(1)
+    return merged
+
+
+def add_activity_metrics(merged):
+    """Rolling sleep debt, 7-day step average and load-bearing frequency per phase.
+
+    Sleep_debt_7d sums SLEEP_TARGET_HOURS minus Sleep_duration over the last 7
+    rows (days); Steps_avg_7d averages Steps the same way; Load_bearing_phase is
+    the share of days with Load-bearing "Y" in the row's phase of its cycle.
+    Blank days are left out of each.
+    """
+    window = dict(window=ROLLING_DAYS, min_periods=1)
+    debt = SLEEP_TARGET_HOURS - merged["Sleep_duration"].astype(np.float64)
+    merged["Sleep_debt_7d"] = debt.rolling(**window).sum().round(1)
+    merged["Steps_avg_7d"] = merged["Steps"].astype(np.float64).rolling(**window).mean().round(0)
+    load_bearing = (merged["Load-bearing"] == "Y").astype(np.float64)
+    by_phase = load_bearing.groupby([merged["Cycle No."], merged["Phase"]], observed=True, dropna=True)
+    merged["Load_bearing_phase"] = by_phase.transform("mean").round(2)
+    return merged
@@ -0,0 +1,164 @@
+import os
+import json
+import sqlite3
+import hashlib
+import datetime
+import pandas as pd
+from .checkpoint import state_path
+from .schema import widen_floats
+from .debug_util import debug
+
+# Local SQLite history of every computed Tactical DB day, one partition per cycle.
+# The sheet can then keep only the recent cycles (TACTICAL_HOT_CYCLES) while
+# read_archive still answers any date or cycle range.
+CYCLE = "Cycle No."
+TABLE = "daily"
+
+
+def archive_path():
+    """Archive file, TACTICAL_ARCHIVE or tactical_archive.sqlite under STATE_DIR."""
+    return os.environ.get("TACTICAL_ARCHIVE") or state_path("tactical_archive.sqlite")
+
+
+def _connect(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS partitions (cycle INTEGER PRIMARY KEY, hash TEXT, rows INTEGER, "
+                 "first_date TEXT, last_date TEXT)")
+    return conn
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _cell(value):
+    """Python value SQLite stores as is: dates as ISO text, NaN/NaT as NULL."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        return value.strftime("%Y-%m-%d")
+    if hasattr(value, "item"):  # numpy scalar
+        return value.item()
+    return value
+
+
+def _rows(frame):
+    return [[_cell(v) for v in row] for row in frame.astype(object).itertuples(index=False, name=None)]
+
+
+def _partition_hash(rows):
+    return hashlib.sha1(json.dumps(rows, default=str).encode()).hexdigest()[:16]
+
+
+def _create_table(conn, header):
+    conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    conn.execute("DELETE FROM partitions")
+    conn.execute(f"CREATE TABLE {TABLE} ({', '.join(_quote(c) for c in header)})")
+    conn.execute(f"CREATE INDEX {TABLE}_cycle ON {TABLE} ({_quote(CYCLE)})")
+    conn.execute(f"CREATE INDEX {TABLE}_date ON {TABLE} ({_quote('Date')})")
+    conn.execute("INSERT OR REPLACE INTO meta VALUES ('header', ?)", (json.dumps(header),))
+
+
+def write_archive(frame, path=None):
+    """Store every row of frame in the archive, one partition per Cycle No.
+
+    New cycles are appended; a cycle whose rows are unchanged since the last run
+    is left alone, and one that changed (a late correction) is replaced as a
+    whole. A different set of columns rebuilds the archive. All in one
+    transaction. Returns (partitions written, partitions unchanged).
+    """
+    path = path or archive_path()
+    frame = widen_floats(frame)  # 16.3, not the float32 16.299999237060547
+    header = [str(c) for c in frame.columns]
+    written, unchanged = 0, 0
+    with _connect(path) as conn:
+        stored = conn.execute("SELECT value FROM meta WHERE key = 'header'").fetchone()
+        if stored is None or json.loads(stored[0]) != header:
+            debug(f"🗄️ Archive {path}: new layout, rebuilding")
+            _create_table(conn, header)
+        known = dict(conn.execute("SELECT cycle, hash FROM partitions"))
+
+        placeholders = ", ".join("?" * len(header))
+        cycles = frame[CYCLE].astype("int64")
+        for cycle, part in frame.groupby(cycles, sort=True):
+            rows = _rows(part)
+            digest = _partition_hash(rows)
+            if known.pop(int(cycle), None) == digest:
+                unchanged += 1
+                continue
+            dates = [d for d in (_cell(v) for v in part["Date"]) if d is not None]
+            conn.execute(f"DELETE FROM {TABLE} WHERE {_quote(CYCLE)} = ?", (int(cycle),))
+            conn.executemany(f"INSERT INTO {TABLE} VALUES ({placeholders})", rows)
+            conn.execute("INSERT OR REPLACE INTO partitions VALUES (?, ?, ?, ?, ?)",
+                         (int(cycle), digest, len(rows), min(dates, default=None), max(dates, default=None)))
+            written += 1
+        # Cycles that no longer exist (the history was renumbered)
+        for cycle in known:
+            conn.execute(f"DELETE FROM {TABLE} WHERE {_quote(CYCLE)} = ?", (cycle,))
+            conn.execute("DELETE FROM partitions WHERE cycle = ?", (cycle,))
+    conn.close()
+    debug(f"🗄️ Archive {path}: {written} cycles written, {unchanged} unchanged")
+    return written, unchanged
+
+
+def _iso(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return datetime.datetime.strptime(value.strip(), "%d/%m/%Y").strftime("%Y-%m-%d")
+    return value.strftime("%Y-%m-%d")
+
+
+def read_archive(start=None, end=None, cycles=None, path=None):
+    """Archived rows between two dates and/or for some cycles, oldest first.
+
+    start and end are inclusive, as dates or dd/mm/YYYY strings; cycles is a list
+    of Cycle No. values. With no filter the whole history is returned. Date comes
+    back as datetime64.
+    """
+    path = path or archive_path()
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No Tactical DB archive at {path}")
+    where, params = [], []
+    if start is not None:
+        where.append(f"{_quote('Date')} >= ?")
+        params.append(_iso(start))
+    if end is not None:
+        where.append(f"{_quote('Date')} <= ?")
+        params.append(_iso(end))
+    if cycles:
+        where.append(f"{_quote(CYCLE)} IN ({', '.join('?' * len(cycles))})")
+        params.extend(int(c) for c in cycles)
+    query = f"SELECT * FROM {TABLE}" + (f" WHERE {' AND '.join(where)}" if where else "")
+    query += f" ORDER BY {_quote(CYCLE)}, {_quote('Date')}"
+    conn = sqlite3.connect(path)
+    try:
+        frame = pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+    frame["Date"] = pd.to_datetime(frame["Date"], format="%Y-%m-%d", errors="coerce")
+    return frame
+
+
+def archive_extent(path=None):
+    """(rows, rows without a Date, last Date) of the archive, or None when there is none yet."""
+    path = path or archive_path()
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path)
+    try:
+        rows, dated, last = conn.execute(f"SELECT COUNT(*), COUNT({_quote('Date')}), MAX({_quote('Date')}) FROM {TABLE}").fetchone()
+    except sqlite3.OperationalError:  # (no table yet)
+        return None
+    finally:
+        conn.close()
+    return rows, rows - dated, pd.Timestamp(last) if last else None
+
+
+def hot_window(frame, cycles):
+    """Rows of the last `cycles` cycles (all rows when cycles is 0)."""
+    if cycles <= 0 or frame.empty:
+        return frame
+    return frame[frame[CYCLE] > frame[CYCLE].max() - cycles]
@@ -0,0 +1,394 @@
+import os
+import re
+import csv
+import json
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from numbers import Real
+from .debug_util import debug
+
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+
+class SheetBackend(ABC):
+    """The handful of spreadsheet operations the tracker scripts use.
+
+    Every backend counts the API calls it makes (or would make) in `calls` and the
+    cells each write sends in `cells`, keyed by operation name. With count_bytes
+    on (TRACE_BYTES) it also adds up the JSON size of the values sent or received
+    in `bytes`; that takes a pass over every payload, so it is off by default.
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.cells = Counter()
+        self.bytes = Counter()
+        self.count_bytes = False
+        self._lock = threading.Lock()  # sheets can be read from several threads at once
+
+    def count(self, op, cells=0, nbytes=0):
+        with self._lock:
+            self.calls[op] += 1
+            self.cells[op] += cells
+            self.bytes[op] += nbytes
+
+    @abstractmethod
+    def open_by_url(self, url):
+        """The workbook at url (a Google Sheets URL, or a workbook name for the offline backends)."""
+
+    def payload_bytes(self, values):
+        return _payload_bytes(values) if self.count_bytes else 0
+
+    def report(self):
+        return {"calls": dict(self.calls), "cells": dict(self.cells), "bytes": dict(self.bytes)}
+
+
+def _count_cells(values):
+    return sum(len(row) for row in values)
+
+
+def _payload_bytes(values):
+    return len(json.dumps(values, default=str))
+
+
+def frame_rows(df, include_column_header):
+    """Cell values for a DataFrame, represented the way gspread_dataframe does it."""
+    def cell(value):
+        try:
+            if value is None or value != value:  # None / NaN / NaT
+                return ""
+        except (TypeError, ValueError):
+            pass
+        if isinstance(value, Real):
+            return value
+        return str(value)
+
+    rows = [[cell(v) for v in df.columns]] if include_column_header else []
+    rows.extend([cell(v) for v in row] for row in df.itertuples(index=False, name=None))
+    return rows
+
+
+# ==============================
+# Google Sheets via gspread
+# ==============================
+class GspreadBackend(SheetBackend):
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    def open_by_url(self, url):
+        self.count("open_by_url")
+        return GspreadWorkbook(self, self.client.open_by_url(url))
+
+
+class GspreadWorkbook:
+    def __init__(self, backend, spreadsheet):
+        self.backend = backend
+        self.spreadsheet = spreadsheet
+        self.title = spreadsheet.title
+
+    def worksheet(self, title):
+        self.backend.count("worksheet")
+        return GspreadWorksheet(self.backend, self.spreadsheet.worksheet(title))
+
+    def worksheets(self):
+        self.backend.count("worksheets")
+        return [GspreadWorksheet(self.backend, ws) for ws in self.spreadsheet.worksheets()]
+
+    def last_update_time(self):
+        """Drive modifiedTime of the spreadsheet (one light metadata call)."""
+        self.backend.count("last_update_time")
+        return self.spreadsheet.get_lastUpdateTime()
+
+
+class GspreadWorksheet:
+    def __init__(self, backend, worksheet):
+        self.backend = backend
+        self.worksheet = worksheet
+        self.title = worksheet.title
+
+    def get_all_records(self):
+        records = self.worksheet.get_all_records()
+        self.backend.count("get_all_records", nbytes=self.backend.payload_bytes(records))
+        return records
+
+    def row_values(self, row):
+        values = self.worksheet.row_values(row)
+        self.backend.count("row_values", nbytes=self.backend.payload_bytes(values))
+        return values
+
+    def get_values(self, range_name):
+        values = self.worksheet.get_values(range_name)
+        self.backend.count("get_values", nbytes=self.backend.payload_bytes(values))
+        return values
+
+    def update(self, range_name, values, value_input_option=None):
+        self.backend.count("update", _count_cells(values), self.backend.payload_bytes(values))
+        return self.worksheet.update(range_name=range_name, values=values, value_input_option=value_input_option)
+
+    def batch_update(self, data, value_input_option=None):
+        self.backend.count("batch_update", sum(_count_cells(d["values"]) for d in data), self.backend.payload_bytes(data))
+        return self.worksheet.batch_update(data, value_input_option=value_input_option)
+
+    def append_rows(self, values, value_input_option="RAW"):
+        self.backend.count("append_rows", _count_cells(values), self.backend.payload_bytes(values))
+        return self.worksheet.append_rows(values, value_input_option=value_input_option)
+
+    def set_with_dataframe(self, df, row=1, col=1, include_column_header=True):
+        from gspread_dataframe import set_with_dataframe
+        # (the cells are counted from the frame's shape; its values are only converted when bytes are counted)
+        cells = (len(df) + bool(include_column_header)) * len(df.columns)
+        nbytes = _payload_bytes(frame_rows(df, include_column_header)) if self.backend.count_bytes else 0
+        self.backend.count("set_with_dataframe", cells, nbytes)
+        set_with_dataframe(self.worksheet, df, row=row, col=col, include_column_header=include_column_header)
+
+
+# ==============================
+# Local workbooks: one folder per spreadsheet, one CSV per worksheet
+# ==============================
+class LocalBackend(SheetBackend):
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+
+    def workbook_dir(self, url):
+        from gspread.utils import extract_id_from_url
+        from gspread.exceptions import NoValidUrlKeyFound
+        try:
+            key = extract_id_from_url(url)
+        except NoValidUrlKeyFound:
+            key = re.sub(r"[^A-Za-z0-9_.-]+", "_", url).strip("_")
+        return os.path.join(self.root, key)
+
+    def open_by_url(self, url):
+        from gspread.exceptions import SpreadsheetNotFound
+        self.count("open_by_url")
+        path = self.workbook_dir(url)
+        if not os.path.isdir(path):
+            raise SpreadsheetNotFound(f"No local workbook at {path}")
+        return LocalWorkbook(self, path)
+
+
+class LocalWorkbook:
+    def __init__(self, backend, path):
+        self.backend = backend
+        self.path = path
+        self.title = os.path.basename(path)
+
+    def _titles(self):
+        return sorted(name[:-4] for name in os.listdir(self.path) if name.endswith(".csv"))
+
+    def worksheet(self, title):
+        from gspread.exceptions import WorksheetNotFound
+        self.backend.count("worksheet")
+        if title not in self._titles():
+            raise WorksheetNotFound(title)
+        return LocalWorksheet(self.backend, os.path.join(self.path, f"{title}.csv"), title)
+
+    def worksheets(self):
+        self.backend.count("worksheets")
+        return [LocalWorksheet(self.backend, os.path.join(self.path, f"{t}.csv"), t) for t in self._titles()]
+
+    def last_update_time(self):
+        """Latest modification time of any worksheet file, standing in for Drive's modifiedTime."""
+        self.backend.count("last_update_time")
+        return str(max((os.stat(os.path.join(self.path, f"{t}.csv")).st_mtime_ns for t in self._titles()), default=0))
+
+
+def _cell_text(value):
+    """What a written value reads back as (numbers keep the sheet's default display)."""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class LocalWorksheet:
+    def __init__(self, backend, path, title):
+        self.backend = backend
+        self.path = path
+        self.title = title
+
+    # --- storage
+    def _read(self):
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return [row for row in csv.reader(f)]
+
+    def _write(self, grid):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(grid)
+        os.replace(tmp, self.path)
+
+    def get_all_values(self):
+        """Grid of display strings, trimmed to the last non-empty row/column and padded like the API."""
+        grid = self._read()
+        while grid and not any(grid[-1]):
+            grid.pop()
+        width = max((max((i + 1 for i, v in enumerate(row) if v != ""), default=0) for row in grid), default=0)
+        return [(row + [""] * width)[:width] for row in grid]
+
+    def _set_range(self, grid, range_name, values):
+        from gspread.utils import a1_range_to_grid_range
+        range_name = range_name.split("!")[-1]
+        bounds = a1_range_to_grid_range(range_name)
+        top, left = bounds.get("startRowIndex", 0), bounds.get("startColumnIndex", 0)
+        bottom, right = bounds.get("endRowIndex"), bounds.get("endColumnIndex")
+        if ":" not in range_name:  # a single cell anchors the values instead of bounding them
+            bottom = right = None
+        for r, row in enumerate(values):
+            for c, value in enumerate(row):
+                if value is None:  # null cells are skipped by the API
+                    continue
+                if (bottom is not None and top + r >= bottom) or (right is not None and left + c >= right):
+                    raise ValueError(f"Requested writing within range {range_name}, but tried writing outside it")
+                while len(grid) <= top + r:
+                    grid.append([])
+                cells = grid[top + r]
+                cells.extend([""] * (left + c + 1 - len(cells)))
+                cells[left + c] = _cell_text(value)
+
+    # --- operations
+    def get_all_records(self):
+        from gspread.utils import numericise_all
+        data = self.get_all_values()
+        records = [dict(zip(data[0], numericise_all(row))) for row in data[1:]] if data else []
+        self.backend.count("get_all_records", nbytes=self.backend.payload_bytes(records))
+        return records
+
+    def row_values(self, row):
+        grid = self._read()
+        values = grid[row - 1] if row <= len(grid) else []
+        while values and values[-1] == "":
+            values = values[:-1]
+        self.backend.count("row_values", nbytes=self.backend.payload_bytes(values))
+        return list(values)
+
+    def get_values(self, range_name):
+        """Display strings of an A1 range ("A2:O501", "2:501"), trimmed and padded like get_all_values."""
+        from gspread.utils import a1_range_to_grid_range
+        bounds = a1_range_to_grid_range(range_name.split("!")[-1])
+        grid = self.get_all_values()
+        top, bottom = bounds.get("startRowIndex", 0), bounds.get("endRowIndex", len(grid))
+        left, right = bounds.get("startColumnIndex", 0), bounds.get("endColumnIndex")
+        values = [row[left:right] for row in grid[top:bottom]]
+        while values and not any(values[-1]):
+            values.pop()
+        self.backend.count("get_values", nbytes=self.backend.payload_bytes(values))
+        return values
+
+    def update(self, range_name, values, value_input_option=None):
+        self.backend.count("update", _count_cells(values), self.backend.payload_bytes(values))
+        grid = self._read()
+        self._set_range(grid, range_name, values)
+        self._write(grid)
+
+    def batch_update(self, data, value_input_option=None):
+        self.backend.count("batch_update", sum(_count_cells(d["values"]) for d in data), self.backend.payload_bytes(data))
+        grid = self._read()
+        for d in data:
+            self._set_range(grid, d["range"], d["values"])
+        self._write(grid)
+
+    def append_rows(self, values, value_input_option="RAW"):
+        self.backend.count("append_rows", _count_cells(values), self.backend.payload_bytes(values))
+        grid = self._read()
+        while grid and not any(grid[-1]):
+            grid.pop()
+        self._set_range(grid, f"A{len(grid) + 1}", values)
+        self._write(grid)
+
+    def set_with_dataframe(self, df, row=1, col=1, include_column_header=True):
+        from gspread.utils import rowcol_to_a1
+        rows = frame_rows(df, include_column_header)
+        self.backend.count("set_with_dataframe", _count_cells(rows), self.backend.payload_bytes(rows))
+        grid = self._read()
+        self._set_range(grid, rowcol_to_a1(row, col), rows)
+        self._write(grid)
+
+
+# ==============================
+# In-memory workbooks (benchmarks): same cell semantics as the local CSV backend
+# ==============================
+class MemoryBackend(SheetBackend):
+    """Workbooks held in memory as {url: {sheet title: grid of display strings}}."""
+
+    def __init__(self, workbooks):
+        super().__init__()
+        self.workbooks = workbooks
+        self.versions = Counter()  # writes per workbook
+
+    def open_by_url(self, url):
+        from gspread.exceptions import SpreadsheetNotFound
+        self.count("open_by_url")
+        if url not in self.workbooks:
+            raise SpreadsheetNotFound(f"No in-memory workbook {url}")
+        return MemoryWorkbook(self, url)
+
+
+class MemoryWorkbook:
+    def __init__(self, backend, url):
+        self.backend = backend
+        self.url = url
+        self.title = url
+        self.sheets = backend.workbooks[url]
+
+    def worksheet(self, title):
+        from gspread.exceptions import WorksheetNotFound
+        self.backend.count("worksheet")
+        if title not in self.sheets:
+            raise WorksheetNotFound(title)
+        return MemoryWorksheet(self, title)
+
+    def worksheets(self):
+        self.backend.count("worksheets")
+        return [MemoryWorksheet(self, title) for title in sorted(self.sheets)]
+
+    def last_update_time(self):
+        """Number of writes made to the workbook so far, standing in for Drive's modifiedTime."""
+        self.backend.count("last_update_time")
+        return str(self.backend.versions[self.url])
+
+
+class MemoryWorksheet(LocalWorksheet):
+    def __init__(self, workbook, title):
+        super().__init__(workbook.backend, None, title)
+        self.workbook = workbook
+
+    def _read(self):
+        return [list(row) for row in self.workbook.sheets[self.title]]
+
+    def _write(self, grid):
+        self.workbook.sheets[self.title] = grid
+        with self.backend._lock:
+            self.backend.versions[self.workbook.url] += 1
+
+
+def load_credentials(key_input):
+    """Service-account credentials from an inlined JSON string or a key file path."""
+    # 🧠 Determine whether this is a raw JSON string or a file path
+    if key_input.strip().startswith("{"):
+        debug("🔐 Detected inlined JSON credentials from GitHub Secrets.")
+        return json.loads(key_input)
+    debug(f"📄 Loading credentials from file: {key_input}")
+    with open(key_input) as f:
+        return json.load(f)
+
+
+def open_backend():
+    """Backend picked by SHEET_BACKEND: 'gspread' (default, live Google Sheets) or 'local'."""
+    kind = os.environ.get("SHEET_BACKEND", "gspread").strip().lower()
+    if kind == "local":
+        root = os.environ.get("LOCAL_SHEETS_DIR", "local_sheets")
+        debug(f"🗂️ Using local sheet backend at {root}")
+        return LocalBackend(root)
+    if kind != "gspread":
+        raise ValueError(f"Unknown SHEET_BACKEND {kind!r}, expected 'gspread' or 'local'")
+
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+    credentials_dict = load_credentials(os.environ["KEY_FILE_NAME"])
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, SCOPE)
+    return GspreadBackend(gspread.authorize(creds))
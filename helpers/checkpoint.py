@@ -0,0 +1,129 @@
+import os
+import json
+import pandas as pd
+from .nutrition import is_manual
+from .debug_util import debug
+
+STATE_VERSION = 2
+# State files read or saved by this process: path -> (file mtime, state)
+_in_memory = {}
+
+# Food Log fields that decide a row's nutrition; the manual ones only count on manual rows
+_LOG_FIELDS = ["Date", "Food_Data_ID", "Value", "Conversion", "Manual Input"]
+_MANUAL_FIELDS = ["Kcal", "P", "C", "F", "Saturated Fat g", "Fibre g", "Sugar g"]
+# Food Data fields the nutrition engine reads
+_FOOD_FIELDS = ["Per Unit", "Kcal", "Protein g", "Carb g", "Fat g", "Saturated Fat g", "Fibre g", "Sugar g"]
+
+
+def state_path(name):
+    """Location of a local state file, under STATE_DIR (default .state/)."""
+    return os.path.join(os.environ.get("STATE_DIR", ".state"), name)
+
+
+def load_state(path):
+    """Read a state file, or return None when it is missing or was written by another version.
+
+    A state this process saved or read is served from memory while the file is unchanged.
+    """
+    if not os.path.exists(path):
+        debug(f"📭 No state file at {path}, running a full pass")
+        return None
+    stamp = os.stat(path).st_mtime_ns
+    if path in _in_memory and _in_memory[path][0] == stamp:
+        return _in_memory[path][1]
+    with open(path) as f:
+        state = json.load(f)
+    if state.get("version") != STATE_VERSION or state.get("pandas") != pd.__version__:
+        debug(f"♻️ State file {path} is from another version, running a full pass")
+        return None
+    _in_memory[path] = (stamp, state)
+    return state
+
+
+def save_state(path, state):
+    """Write a state file atomically so an interrupted run never leaves half a checkpoint."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+    _in_memory[path] = (os.stat(path).st_mtime_ns, state)
+
+
+def _hash_rows(frame):
+    return pd.util.hash_pandas_object(frame.astype(str), index=False).map("{:016x}".format)
+
+
+def _field(df, name):
+    return df[name] if name in df.columns else pd.Series("", index=df.index)
+
+
+def fingerprint_food_data(food_index):
+    """Hash of each Food Data row the engine can look up, keyed by stripped ID."""
+    fields = pd.DataFrame({name: _field(food_index, name) for name in _FOOD_FIELDS}, index=food_index.index)
+    return dict(zip(food_index.index, _hash_rows(fields)))
+
+
+def fingerprint_food_log(food_log, food_hashes):
+    """Hash of each Food Log row, including the hash of the Food Data row it references.
+
+    Editing a Food Data entry therefore changes the fingerprint of every log row using it.
+    """
+    manual = is_manual(food_log)
+    fields = pd.DataFrame({name: _field(food_log, name) for name in _LOG_FIELDS}, index=food_log.index)
+    for name in _MANUAL_FIELDS:
+        fields[name] = _field(food_log, name).where(manual, "")
+    food_id = food_log["Food_Data_ID"].astype(str).str.strip()
+    fields["_food"] = food_id.map(food_hashes).fillna("")
+    return _hash_rows(fields)
+
+
+def plan_incremental(food_log, row_hashes, food_hashes, state):
+    """Work out which Food Log rows are new or changed since the saved state.
+
+    Returns (dirty, touched_dates): a boolean Series over the log rows, and the set
+    of Date strings whose daily totals must be recomputed, including dates that
+    lost rows since the last run.
+    """
+    dates = food_log["Date"].astype(str).str.strip()
+    if state is None:
+        return pd.Series(True, index=food_log.index), set(dates)
+
+    previous = state["rows"]
+    counts = row_hashes.value_counts()
+    previous_counts = row_hashes.map({h: count for h, (_, count) in previous.items()}).fillna(0)
+    dirty = previous_counts != row_hashes.map(counts)
+    touched = set(dates[dirty])
+    for h, (date, count) in previous.items():
+        if counts.get(h, 0) < count:
+            touched.add(date)
+
+    changed_food = [i for i, h in food_hashes.items() if state["food"].get(i) != h]
+    debug(f"🥕 Food Data entries changed since last run: {len(changed_food)}")
+    return dirty, touched
+
+
+def build_state(food_log, row_hashes, food_hashes):
+    """State to persist once the run has written its results."""
+    dates = food_log["Date"].astype(str).str.strip()
+    rows = {}
+    for h, date in zip(row_hashes, dates):
+        entry = rows.setdefault(h, [date, 0])
+        entry[1] += 1
+    return {"version": STATE_VERSION, "pandas": pd.__version__, "rows": rows, "food": food_hashes}
+
+
+def split_state(state, since):
+    """Split a saved Food Log state at the first day of a window.
+
+    Returns (the state with only the rows dated since or later, {hash: [date, count]}
+    of the rows dated before it). A windowed run compares the rows it read against
+    the first and keeps the second for the next run.
+    """
+    if state is None:
+        return None, {}
+    entries = list(state["rows"].items())
+    dates = pd.to_datetime(pd.Series([date for _, (date, _) in entries], dtype=object), errors="coerce")
+    before = (dates < pd.Timestamp(since)).tolist()
+    inside = dict(entry for entry, b in zip(entries, before) if not b)
+    return dict(state, rows=inside), dict(entry for entry, b in zip(entries, before) if b)
@@ -0,0 +1,226 @@
+import os
+import sys
+import time
+import argparse
+
+# Only argparse is imported up front: pandas, gspread and the stages are loaded by the
+# command that needs them, so --help and validate start straight away.
+
+PLAN_STAGES = ["nutrition", "tactical", "backfill"]
+DRY_RUN_HELP = "build the write plan, save it under the state dir and print it without writing anything"
+
+
+def _dry_run(args):
+    # the stages read DRY_RUN from the config, like every other setting
+    if args.dry_run:
+        os.environ["DRY_RUN"] = "1"
+
+
+def _backfill_window(args):
+    # --from / --to / --columns become the BACKFILL_* settings
+    for option, key in (("start", "BACKFILL_FROM"), ("end", "BACKFILL_TO"), ("columns", "BACKFILL_COLUMNS")):
+        if getattr(args, option, None):
+            os.environ[key] = getattr(args, option)
+
+
+def _since(args):
+    # --since / --window-days become SINCE / WINDOW_DAYS
+    if getattr(args, "since", None):
+        os.environ["SINCE"] = args.since
+    if getattr(args, "window_days", None) is not None:
+        os.environ["WINDOW_DAYS"] = str(args.window_days)
+
+
+def _stage_command(module, span_name):
+    def command(args):
+        _dry_run(args)
+        _backfill_window(args)
+        _since(args)
+        from importlib import import_module
+        from .config import bootstrap
+        from .session import open_session
+        from .trace import tracer, span
+        stage = import_module(f"helpers.stages.{module}")
+        config = bootstrap(stage.verbose_safety)
+        # Auth + config (SHEET_BACKEND=local swaps Google Sheets for local CSV workbooks)
+        session = open_session(config)
+        with span(span_name):
+            stage.run(session, config)
+        tracer.write()
+        return 0
+    return command
+
+
+def _pipeline(args):
+    _dry_run(args)
+    _backfill_window(args)
+    _since(args)
+    from .config import bootstrap
+    from .session import open_session
+    from .trace import tracer
+    from .stages.pipeline import run_pipeline, safety_on
+    config = bootstrap(safety_on())
+    # One authorized client and one set of opened sheets for every stage
+    run_pipeline(open_session(config), config, backfill=args.backfill)
+    tracer.write()
+    return 0
+
+
+def _batch(args):
+    from .config import bootstrap
+    from .checkpoint import state_path
+    from .stages.pipeline import safety_on
+    from .stages.batch import load_manifest, run_batch, write_batch_report
+    bootstrap(safety_on())
+    # (BATCH_WORKERS is a batch setting, not a profile one, so it is read from the environment rather than the config)
+    workers = args.workers or int(os.environ.get("BATCH_WORKERS") or 2)
+    started = time.time()
+    results = run_batch(load_manifest(args.manifest), state_path("profiles"), workers=workers, backfill=args.backfill)
+    write_batch_report(results, started)
+
+    failed = [r["name"] for r in results if r["status"] != "ok"]
+    print(f"👥 Batch: {len(results) - len(failed)} profiles updated, {len(failed)} failed" + (f" ({', '.join(failed)})" if failed else ""))
+    return 1 if failed else 0
+
+
+def _watch(args):
+    _since(args)
+    from .config import bootstrap
+    from .session import open_session
+    from .stages.pipeline import safety_on
+    from .stages.watch import Watcher, serve
+    config = bootstrap(safety_on())
+    # incremental unless the config says otherwise, so a poll only recomputes what changed
+    config.setdefault("INCREMENTAL", "1")
+    interval = args.interval or float(config.get("WATCH_INTERVAL") or 60)
+    port = args.port if args.port is not None else int(config.get("WATCH_PORT") or 0)
+    watcher = Watcher(open_session(config), config)
+    if port:
+        serve(watcher, port)
+    print(f"👀 Watching the sheets every {interval}s (Ctrl+C to stop)")
+    try:
+        watcher.loop(interval, max_runs=args.runs)
+    except KeyboardInterrupt:
+        print("👋 Watch stopped")
+    return 0
+
+
+def _validate(args):
+    from .config import STAGE_KEYS, load_config, validate_config
+    problems = validate_config(load_config(), args.stage or list(STAGE_KEYS))
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        return 1
+    print("✅ Configuration looks good")
+    return 0
+
+
+def _history(args):
+    from .archive import read_archive
+    frame = read_archive(args.start, args.end, args.cycle, path=args.archive)
+    frame["Date"] = frame["Date"].dt.strftime("%d/%m/%Y")
+    frame.to_csv(args.out or sys.stdout, index=False)
+    if args.out:
+        print(f"🗄️ {len(frame)} archived days written to {args.out}")
+    return 0
+
+
+def _plan(args):
+    from .write_plan import plan_path, load_plan, discard_plan
+    for stage in args.discard or []:
+        discard_plan(plan_path(stage))
+        print(f"🗑️ Discarded the unfinished {stage} write plan")
+    if args.discard:
+        return 0
+    found = False
+    for stage in PLAN_STAGES:
+        plan, done = load_plan(plan_path(stage))
+        if plan is None:
+            continue
+        found = True
+        print(f"⏸️ {stage}: {len(done)} of {len(plan.chunks)} chunks applied, planned at {plan.created}")
+        if args.verbose:
+            print("\n".join(plan.describe()))
+    if not found:
+        print("✅ No unfinished write plans")
+    return 0
+
+
+def _add_window_options(parser):
+    parser.add_argument("--from", dest="start", help="first date to backfill, dd/mm/YYYY (default BACKFILL_FROM or the start)")
+    parser.add_argument("--to", dest="end", help="last date to backfill, dd/mm/YYYY (default BACKFILL_TO or the end)")
+    parser.add_argument("--columns", help="comma-separated master columns to backfill (default BACKFILL_COLUMNS or Sat Fat / Fibre / Sugar)")
+
+
+def _add_since_options(parser):
+    parser.add_argument("--since", help="only read and recompute the days from this date on, dd/mm/YYYY (default SINCE)")
+    parser.add_argument("--window-days", type=int, help="only read and recompute the last N days (default WINDOW_DAYS)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="tracker", description="Cycle and nutrition tracker stages.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    for name, module, help_text in [
+        ("nutrition", "nutrition", "fill the Food Log nutrition cells and update the master table"),
+        ("tactical", "tactical", "rebuild the Tactical DB from the master table and the Activity Log"),
+        ("backfill", "backfill", "backfill nutrient columns of the master table from the Food Log, for a window of dates"),
+    ]:
+        stage = commands.add_parser(name, help=help_text)
+        stage.add_argument("--dry-run", action="store_true", help=DRY_RUN_HELP)
+        _add_since_options(stage)
+        if name == "backfill":
+            _add_window_options(stage)
+        stage.set_defaults(func=_stage_command(module, name))
+
+    pipeline = commands.add_parser("pipeline", help="run nutrition, the optional backfill and tactical in one process")
+    pipeline.add_argument("--backfill", action="store_true", help="also run the backfill of Sat Fat / Fibre / Sugar")
+    pipeline.add_argument("--dry-run", action="store_true", help=DRY_RUN_HELP)
+    _add_window_options(pipeline)
+    _add_since_options(pipeline)
+    pipeline.set_defaults(func=_pipeline)
+
+    batch = commands.add_parser("batch", help="run the pipeline for every profile in a manifest")
+    batch.add_argument("manifest", help="JSON manifest of profiles (see profiles.template.json)")
+    batch.add_argument("--workers", type=int, help="processes to run at once (default BATCH_WORKERS or 2)")
+    batch.add_argument("--backfill", action="store_true", help="also run the backfill for every profile")
+    batch.set_defaults(func=_batch)
+
+    watch = commands.add_parser("watch", help="keep running and update the sheets within seconds of a change")
+    watch.add_argument("--interval", type=float, help="seconds between checks for changes (default WATCH_INTERVAL or 60)")
+    watch.add_argument("--port", type=int, help="serve /run and /status on this localhost port (default WATCH_PORT, 0 for none)")
+    watch.add_argument("--runs", type=int, help="stop after this many runs (default: until interrupted)")
+    _add_since_options(watch)
+    watch.set_defaults(func=_watch)
+
+    history = commands.add_parser("history", help="read a date or cycle range from the local Tactical DB archive as CSV")
+    history.add_argument("--from", dest="start", help="first date, dd/mm/YYYY")
+    history.add_argument("--to", dest="end", help="last date, dd/mm/YYYY")
+    history.add_argument("--cycle", type=int, action="append", help="Cycle No. to include (repeatable)")
+    history.add_argument("--archive", help="archive file (default TACTICAL_ARCHIVE or .state/tactical_archive.sqlite)")
+    history.add_argument("--out", help="CSV file to write (default: print)")
+    history.set_defaults(func=_history)
+
+    plan = commands.add_parser("plan", help="list the write plans an interrupted run left unfinished")
+    plan.add_argument("--discard", action="append", choices=PLAN_STAGES, help="drop a stage's unfinished plan instead of resuming it")
+    plan.add_argument("-v", "--verbose", action="store_true", help="show every chunk of each plan")
+    plan.set_defaults(func=_plan)
+
+    validate = commands.add_parser("validate", help="check the configuration and credentials without opening any sheet")
+    validate.add_argument("--stage", action="append", choices=["nutrition", "tactical", "backfill"], help="only check what this stage needs (repeatable)")
+    validate.set_defaults(func=_validate)
+    return parser
+
+
+def main(argv=None):
+    # .env first: the option defaults and the helper modules read their settings from the environment
+    from .config import load_env
+    load_env()
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import os
+import re
+import sys
+import datetime
+from .debug_util import debug
+
+# Environment variables the stages read; anything else in the environment is ignored
+CONFIG_KEYS = [
+    "ENV_NAME",
+    "KEY_FILE_NAME",
+    "SHEET_BACKEND",
+    "LOCAL_SHEETS_DIR",
+    "FOOD_DATA_URL",
+    "FOOD_DATA_URL_SHEET",
+    "RECIPES_SHEET",
+    "FOOD_LOG_URL",
+    "FOOD_LOG_URL_SHEET",
+    "MASTER_TABLE_URL",
+    "MASTER_TABLE_URL_SHEET",
+    "ACTIVITY_LOG_URL",
+    "ACTIVITY_LOG_URL_SHEET",
+    "TACTICAL_DB_URL",
+    "TACTICAL_DB_URL_SHEET",
+    "INCREMENTAL",
+    "FOOD_DATA_REFRESH",
+    "TACTICAL_FORECAST_DAYS",
+    "TACTICAL_HOT_CYCLES",
+    "DRY_RUN",
+    "BACKFILL_FROM",
+    "BACKFILL_TO",
+    "BACKFILL_COLUMNS",
+    "SINCE",
+    "WINDOW_DAYS",
+    "READ_QUOTA_PER_MINUTE",
+    "FETCH_WORKERS",
+    "FOOD_MATCH_CUTOFF",
+    "PAGE_ROWS",
+    "WATCH_INTERVAL",
+    "WATCH_PORT",
+    "TRACE_BYTES",
+]
+
+# Sheet settings each stage needs
+STAGE_KEYS = {
+    "nutrition": ["FOOD_DATA_URL", "FOOD_DATA_URL_SHEET", "FOOD_LOG_URL", "FOOD_LOG_URL_SHEET",
+                  "MASTER_TABLE_URL", "MASTER_TABLE_URL_SHEET"],
+    "tactical": ["MASTER_TABLE_URL", "MASTER_TABLE_URL_SHEET", "ACTIVITY_LOG_URL", "ACTIVITY_LOG_URL_SHEET",
+                 "TACTICAL_DB_URL", "TACTICAL_DB_URL_SHEET"],
+    "backfill": ["FOOD_LOG_URL", "FOOD_LOG_URL_SHEET", "MASTER_TABLE_URL", "MASTER_TABLE_URL_SHEET"],
+}
+# Whole-number settings, from the config or straight from the environment
+NUMBER_KEYS = ["TACTICAL_FORECAST_DAYS", "TACTICAL_HOT_CYCLES", "READ_QUOTA_PER_MINUTE", "FETCH_WORKERS", "BATCH_WORKERS", "PAGE_ROWS", "WINDOW_DAYS", "WATCH_INTERVAL", "WATCH_PORT"]
+# dd/mm/YYYY settings
+DATE_KEYS = ["BACKFILL_FROM", "BACKFILL_TO", "SINCE"]
+
+
+def load_config(environ=None):
+    """The tracker's settings as a plain dict, taken from the environment by default."""
+    environ = os.environ if environ is None else environ
+    return {key: environ[key] for key in CONFIG_KEYS if key in environ}
+
+
+def flag(config, key):
+    """True when a yes/no setting is switched on (1/true/yes)."""
+    return str(config.get(key, "")).strip().lower() in ("1", "true", "yes")
+
+
+def window_since(config, today=None):
+    """First date the stages read and recompute: SINCE (dd/mm/YYYY), else today minus WINDOW_DAYS, else None (everything)."""
+    since = str(config.get("SINCE") or "").strip()
+    if since:
+        return datetime.datetime.strptime(since, "%d/%m/%Y").date()
+    days = str(config.get("WINDOW_DAYS") or "").strip()
+    if days and int(days) > 0:
+        return (today or datetime.date.today()) - datetime.timedelta(days=int(days))
+    return None
+
+
+def load_env():
+    """Load .env into the environment when there is one (there is none under GitHub Actions)."""
+    # Only load .env if running outside GitHub Actions
+    if os.path.exists(".env"):
+        from dotenv import load_dotenv
+        load_dotenv(dotenv_path=".env")
+        debug("✅ Loaded .env from local file")
+    else:
+        debug("📡 Skipping .env load (GitHub Action mode)")
+
+
+def bootstrap(verbose_safety=False):
+    """Load .env, check ENV_NAME and the production-sheet guard, then return the config."""
+    load_env()
+
+    env = os.environ.get("ENV_NAME", "Unknown")
+    if env == "Unknown":
+        debug("❌ ENV_NAME not found in environment. Aborting script.")
+        sys.exit(1)
+
+    else:
+        debug(f"🌿 Running in {env.upper()} mode 🚀")
+
+    config = load_config()
+    check_safety(config, verbose_safety)
+    return config
+
+
+def check_safety(config, verbose_safety=False):
+    """Refuse to run against the production Food Log sheet while verbose_safety is on."""
+    debug("🧪 Sheet loaded:", config.get("FOOD_LOG_URL_SHEET"))
+    if verbose_safety == True and config.get("FOOD_LOG_URL_SHEET") == "Worksheet":
+        raise RuntimeError("🛑 Refusing to write: You are about to overwrite the production sheet.")
+
+
+def validate_config(config, stages=None, environ=None):
+    """Problems that would stop the given stages (default: all), as a list of messages.
+
+    Only the settings and the credentials file are checked; no sheet is opened.
+    """
+    environ = os.environ if environ is None else environ
+    problems = []
+    if not config.get("ENV_NAME"):
+        problems.append("ENV_NAME is not set")
+
+    for stage in stages or STAGE_KEYS:
+        missing = [key for key in STAGE_KEYS[stage] if not config.get(key)]
+        if missing:
+            problems.append(f"{stage}: missing {', '.join(missing)}")
+
+    for key in NUMBER_KEYS:
+        value = config.get(key, environ.get(key))
+        if value not in (None, "") and not str(value).strip().isdigit():
+            problems.append(f"{key} should be a whole number, got {value!r}")
+
+    for key in DATE_KEYS:
+        value = str(config.get(key) or "").strip()
+        if value and not re.fullmatch(r"\d{2}/\d{2}/\d{4}", value):
+            problems.append(f"{key} should be a dd/mm/YYYY date, got {value!r}")
+
+    backend = str(config.get("SHEET_BACKEND", "gspread")).strip().lower()
+    if backend == "local":
+        root = config.get("LOCAL_SHEETS_DIR", "local_sheets")
+        if not os.path.isdir(root):
+            problems.append(f"LOCAL_SHEETS_DIR {root!r} is not a folder")
+    elif backend == "gspread":
+        if not config.get("KEY_FILE_NAME"):
+            problems.append("KEY_FILE_NAME is not set")
+        else:
+            from .backend import load_credentials
+            try:
+                credentials = load_credentials(config["KEY_FILE_NAME"])
+            except (OSError, ValueError) as e:
+                problems.append(f"KEY_FILE_NAME could not be read: {e}")
+            else:
+                missing = [key for key in ("client_email", "private_key") if key not in credentials]
+                if missing:
+                    problems.append(f"Credentials are missing {', '.join(missing)}")
+    else:
+        problems.append(f"SHEET_BACKEND should be 'gspread' or 'local', got {backend!r}")
+    return problems
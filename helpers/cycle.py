@@ -0,0 +1,152 @@
+import hashlib
+import datetime
+import numpy as np
+import pandas as pd
+from .checkpoint import STATE_VERSION
+
+PHASE_ORDER = {
+    "Menstrual": 1,
+    "Follicular": 2,
+    "Ovulatory": 3,
+    "Luteal": 4
+}
+CYCLE_OFFSET = 3  # because my tracker starts at Cycle 4
+
+# Columns the engine produces, in the order create_tactical adds them
+CYCLE_COLUMNS = ["Phase", "First mens day", "Cycle No.", "Cycle_Day"]
+
+INITIAL_STATE = {
+    "cycle_no": CYCLE_OFFSET,     # cycle number of the last processed day
+    "cycle_day": 0,               # its day within that cycle
+    "last_phase": None,           # its Phase before follicular marking / forward fill
+    "last_menstruation": None,    # its Menstruation flag
+    "phase": None,                # its forward-filled Phase
+}
+
+
+def _json_value(value):
+    return None if pd.isna(value) else value
+
+
+def stream_cycle(menstruation, phase, state=None):
+    """Cycle columns for a block of consecutive days, continuing from `state`.
+
+    Feeding the history in several blocks, each with the state returned by the
+    previous one, gives exactly the values of a single pass over all of it.
+    Returns (DataFrame of CYCLE_COLUMNS, new state).
+    """
+    state = dict(INITIAL_STATE if state is None else state)
+    phase = phase.astype(object).copy()
+
+    # Menstrual phase
+    is_mens = menstruation == "Y"
+    phase[is_mens] = "Menstrual"
+
+    # Identify first menstrual day (today is Menstrual, yesterday is not)
+    prev_phase = phase.shift(1)
+    prev_menstruation = menstruation.astype(object).shift(1)
+    if len(phase):
+        prev_phase.iloc[0] = state["last_phase"]
+        prev_menstruation.iloc[0] = state["last_menstruation"]
+    first = (phase == "Menstrual") & ~(prev_phase == "Menstrual")
+    cycle_no = first.cumsum() + state["cycle_no"]
+    last_phase = phase.iloc[-1] if len(phase) else state["last_phase"]
+
+    # Identify the start of follicular day (today is not Menstrual, yesterday is the last day Menstrual)
+    phase[~is_mens & (prev_menstruation == "Y")] = "Follicular"
+
+    # Phase fills as above, carrying the previous block's phase into this one
+    phase = phase.replace("", np.nan).ffill()
+    if state["phase"] is not None:
+        phase = phase.fillna(state["phase"])
+
+    cycle_day = cycle_no.groupby(cycle_no).cumcount() + 1
+    cycle_day[cycle_no == state["cycle_no"]] += state["cycle_day"]
+
+    out = pd.DataFrame({"Phase": phase, "First mens day": first, "Cycle No.": cycle_no, "Cycle_Day": cycle_day})
+    if len(out):
+        state = {
+            "cycle_no": int(cycle_no.iloc[-1]),
+            "cycle_day": int(cycle_day.iloc[-1]),
+            "last_phase": _json_value(last_phase),
+            "last_menstruation": _json_value(menstruation.iloc[-1]),
+            "phase": _json_value(phase.iloc[-1]),
+        }
+    return out, state
+
+
+def _inputs(merged):
+    return merged.reindex(columns=["Date", "Menstruation", "Phase"])
+
+
+def _prefix_hash(inputs):
+    row_hashes = pd.util.hash_pandas_object(inputs.astype(str), index=False).values
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+
+def resume_cycle(merged, saved=None):
+    """Cycle columns for the whole merged history, only processing days added since `saved`.
+
+    `saved` is the checkpoint returned by a previous call. It is reused when the
+    days it covered are unchanged (same Date / Menstruation / Phase inputs);
+    otherwise everything is recomputed. Returns (DataFrame of CYCLE_COLUMNS
+    aligned with merged, new checkpoint).
+    """
+    inputs = _inputs(merged)
+    start, state, previous = 0, None, None
+    if saved is not None and saved["rows"] <= len(merged) and saved["prefix"] == _prefix_hash(inputs.iloc[:saved["rows"]]):
+        start, state = saved["rows"], saved["state"]
+        previous = pd.DataFrame(saved["outputs"], columns=CYCLE_COLUMNS)
+        previous["Phase"] = previous["Phase"].astype(object).where(previous["Phase"].notna(), np.nan)
+
+    new, state = stream_cycle(inputs["Menstruation"].iloc[start:], inputs["Phase"].iloc[start:], state)
+    out = new if previous is None else pd.concat([previous, new.reset_index(drop=True)], ignore_index=True)
+    out.index = merged.index
+    out["First mens day"] = out["First mens day"].astype(bool)
+    out["Cycle No."] = out["Cycle No."].astype("int64")
+    out["Cycle_Day"] = out["Cycle_Day"].astype("int64")
+
+    checkpoint = {
+        "version": STATE_VERSION,
+        "pandas": pd.__version__,
+        "rows": len(merged),
+        "prefix": _prefix_hash(inputs),
+        "state": state,
+        "outputs": {col: [_json_value(v) for v in out[col].tolist()] for col in CYCLE_COLUMNS},
+    }
+    return out, checkpoint
+
+
+def forecast_cycle(dates, cycles, days, recent=3):
+    """Project phases for the `days` after the last dated row from the last `recent` complete cycles.
+
+    Cycle length and the day each phase starts on are averaged over the recent
+    cycles; the current cycle then continues on that average. Returns a DataFrame
+    with Date, Cycle No., Phase, Phase_ID and Cycle_Day, or an empty one when no
+    complete cycle has been recorded yet.
+    """
+    columns = ["Date", "Cycle No.", "Phase", "Phase_ID", "Cycle_Day"]
+    current = cycles["Cycle No."].iloc[-1] if len(cycles) else CYCLE_OFFSET
+    complete = [c for c in cycles["Cycle No."].unique() if CYCLE_OFFSET < c < current][-recent:]
+    valid_dates = pd.to_datetime(pd.Series(dates), errors="coerce").dropna()
+    if days <= 0 or not complete or valid_dates.empty:
+        return pd.DataFrame(columns=columns)
+
+    recent_days = cycles[cycles["Cycle No."].isin(complete)]
+    length = int(round(recent_days.groupby("Cycle No.").size().mean()))
+    starts = (recent_days.dropna(subset=["Phase"])
+              .groupby(["Cycle No.", "Phase"])["Cycle_Day"].min()
+              .groupby("Phase").mean().round().astype(int))
+    starts["Menstrual"] = 1
+    boundaries = sorted((day, phase) for phase, day in starts.items() if phase in PHASE_ORDER)
+
+    cycle_no, cycle_day = int(current), int(cycles["Cycle_Day"].iloc[-1])
+    last_date = valid_dates.iloc[-1].date()
+    rows = []
+    for k in range(1, days + 1):
+        cycle_day += 1
+        if cycle_day > length:
+            cycle_no, cycle_day = cycle_no + 1, 1
+        phase = [p for day, p in boundaries if day <= cycle_day][-1]
+        rows.append([last_date + datetime.timedelta(days=k), cycle_no, phase, PHASE_ORDER[phase], cycle_day])
+    return pd.DataFrame(rows, columns=columns)
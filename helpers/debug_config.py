@@ -1 +1,6 @@
-verbose = True 
\ No newline at end of file
+import os
+
+
+def is_verbose():
+    """VERBOSE=1 turns debug output on (off by default); read on each call, so a .env loaded later still counts."""
+    return os.environ.get("VERBOSE", "0").strip().lower() in ("1", "true", "yes")
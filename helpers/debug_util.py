@@ -1,11 +1,15 @@
-from .debug_config import verbose
+from .debug_config import is_verbose
 
 def debug(*args):
-    """Print debug messages only when verbose is True."""
-    if verbose == True:
-        print(*args)
+    """Print debug messages only when verbose is True.
+
+    Arguments that are callables (e.g. `lambda: df.tail(10)`) are only called
+    when the message is printed, so expensive messages cost nothing when quiet.
+    """
+    if is_verbose():
+        print(*(arg() if callable(arg) else arg for arg in args))
 
 def debug_df(df):
     """Print debug messages for dataframes only when verbose is True."""
-    if verbose == True:
+    if is_verbose():
         df.info()
@@ -0,0 +1,92 @@
+import os
+import hashlib
+import pandas as pd
+from .checkpoint import state_path
+from .nutrition import prepare_food_data, build_food_index
+from .food_names import FoodNameIndex
+from .recipes import build_recipes
+from .quota import READ_LIMITER, with_backoff
+from .debug_util import debug
+
+CACHE_VERSION = 4
+# Payloads already loaded or saved by this process, by cache path (a long-running watch skips the pickle)
+_in_memory = {}
+
+
+def _records(workbook, sheet):
+    worksheet = with_backoff(workbook.worksheet, sheet, limiter=READ_LIMITER)
+    return with_backoff(worksheet.get_all_records, limiter=READ_LIMITER)
+
+
+def cache_path(url, sheet):
+    """Cache file for one Food Data worksheet, under FOOD_DATA_CACHE_DIR (default STATE_DIR).
+
+    Trackers sharing one Food Data catalogue can point FOOD_DATA_CACHE_DIR at the
+    same folder to share its cache.
+    """
+    key = hashlib.sha1(f"{url}|{sheet}".encode()).hexdigest()[:16]
+    name = f"food_data_{key}.pkl"
+    cache_dir = os.environ.get("FOOD_DATA_CACHE_DIR")
+    return os.path.join(cache_dir, name) if cache_dir else state_path(name)
+
+
+def _read_cache(path):
+    if path in _in_memory:
+        return _in_memory[path]
+    if not os.path.exists(path):
+        return None
+    try:
+        payload = pd.read_pickle(path)
+    except Exception as e:  # stale pickle from another pandas version, truncated file...
+        debug(f"⚠️ Ignoring unreadable Food Data cache {path}: {e}")
+        return None
+    if payload.get("version") != CACHE_VERSION:
+        return None
+    _in_memory[path] = payload
+    return payload
+
+
+def load_food_data(workbook, url, sheet, refresh=False, recipes_sheet=None):
+    """Food Data table plus its ID and name indexes, served from a local cache while the sheet is unchanged.
+
+    The cache is revalidated against the spreadsheet's modifiedTime; only when that
+    differs (or refresh is set) is the worksheet downloaded again.
+    With recipes_sheet (a worksheet of the same spreadsheet, see build_recipes)
+    every recipe is added to both indexes like a Food Data row. Recipes are kept
+    in the cache with the fingerprint of their ingredients, so a download only
+    recomputes the ones whose rows or ingredients changed.
+    Returns (food_data, food_index, name_index).
+    """
+    path = cache_path(url, sheet)
+    try:
+        modified = with_backoff(workbook.last_update_time)
+    except Exception as e:
+        debug(f"⚠️ Could not read Food Data modifiedTime, downloading: {e}")
+        modified = None
+
+    payload = None if refresh else _read_cache(path)
+    if (payload is not None and modified is not None and payload["modified"] == modified
+            and payload["recipes_sheet"] == recipes_sheet):
+        debug(f"⚡ Food Data served from cache ({len(payload['food_data'])} rows, modified {modified})")
+        return payload["food_data"], payload["food_index"], payload["name_index"]
+
+    debug("⬇️ Downloading Food Data" + (" (refresh requested)" if refresh else ""))
+    food_data = prepare_food_data(pd.DataFrame(_records(workbook, sheet)))
+    food_index = build_food_index(food_data)
+    names, recipe_cache = food_data, {}
+    if recipes_sheet:
+        recipes, recipe_cache, recomputed = build_recipes(pd.DataFrame(_records(workbook, recipes_sheet)),
+                                                          food_index, payload["recipes"] if payload else None)
+        debug(f"🍲 Recipes: {len(recipes)} ready, {recomputed} computed, {len(recipes) - recomputed} reused from the cache")
+        food_index = pd.concat([food_index, build_food_index(recipes)])
+        names = pd.concat([food_data, recipes[["ID", "Food", "Alias"]]], ignore_index=True)
+    name_index = FoodNameIndex(names)
+    if modified is not None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        payload = {"version": CACHE_VERSION, "modified": modified, "food_data": food_data, "food_index": food_index,
+                   "name_index": name_index, "recipes_sheet": recipes_sheet, "recipes": recipe_cache}
+        tmp = f"{path}.{os.getpid()}.tmp"  # several processes may refresh a shared cache at once
+        pd.to_pickle(payload, tmp)
+        os.replace(tmp, path)
+        _in_memory[path] = payload
+    return food_data, food_index, name_index
@@ -0,0 +1,177 @@
+import re
+import bisect
+import difflib
+from .nutrition import is_manual
+
+# How close a typo must be to a Food/Alias name (difflib ratio) to count as a match,
+# unless FOOD_MATCH_CUTOFF in the config says otherwise
+FUZZY_CUTOFF = 0.85
+# Shortest name tried as a prefix, so "a" does not match half the catalogue
+MIN_PREFIX = 3
+# Candidate IDs listed for an ambiguous name
+REPORT_CANDIDATES = 5
+REPORT_ROWS = 5
+
+
+def normalise_name(name):
+    """Food/Alias name as the index keys it: stripped, lower-cased, single spaces."""
+    if not isinstance(name, str):
+        return ""
+    return re.sub(r"\s+", " ", name.strip().lower())
+
+
+class FoodNameIndex:
+    """Lookup of Food Data IDs by Food or Alias name: exact, by prefix, or fuzzy for typos.
+
+    Built once from the parsed Food Data table (it is cached alongside it). A Food
+    name wins over an Alias with the same spelling; a name that still points at
+    more than one ID is ambiguous rather than guessed.
+    """
+
+    def __init__(self, food_data):
+        self.names = {}  # name -> {"food": [ids], "alias": [ids]}
+        ids = food_data["ID"].astype(str).str.strip()
+        for kind, column in (("food", "Food"), ("alias", "Alias")):
+            if column not in food_data.columns:
+                continue
+            for food_id, name in zip(ids, food_data[column].astype(object)):
+                key = normalise_name(name)
+                if not key or not food_id:
+                    continue
+                found = self.names.setdefault(key, {"food": [], "alias": []})[kind]
+                if food_id not in found:
+                    found.append(food_id)
+        self.sorted_names = sorted(self.names)
+        self.by_length = {}
+        for key in self.sorted_names:
+            self.by_length.setdefault(len(key), []).append(key)
+
+    def __len__(self):
+        return len(self.names)
+
+    def ids(self, key):
+        """IDs a name points at: its Food rows if any, else its Alias rows."""
+        entry = self.names.get(key)
+        if entry is None:
+            return []
+        return entry["food"] or entry["alias"]
+
+    def prefix(self, text):
+        """Names starting with text, in sorted order."""
+        start = bisect.bisect_left(self.sorted_names, text)
+        end = bisect.bisect_left(self.sorted_names, text + "\uffff")
+        return self.sorted_names[start:end]
+
+    def fuzzy(self, text, cutoff=FUZZY_CUTOFF):
+        """Names within cutoff of text, best first, with their scores.
+
+        Only names whose length can reach the cutoff are compared: a ratio of
+        2M/(a+b) >= c needs min(a, b)/max(a, b) >= c/(2-c).
+        """
+        low, high = len(text) * cutoff / (2 - cutoff), len(text) * (2 - cutoff) / cutoff
+        candidates = [key for length, keys in self.by_length.items() if low <= length <= high for key in keys]
+        matcher = difflib.SequenceMatcher(b=text)
+        scored = []
+        for key in candidates:
+            matcher.set_seq1(key)
+            if matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff:
+                score = matcher.ratio()
+                if score >= cutoff:
+                    scored.append((score, key))
+        scored.sort(key=lambda s: (-s[0], s[1]))
+        return scored
+
+    def lookup(self, name, cutoff=FUZZY_CUTOFF):
+        """Resolve one name to (status, ids, matched name), typos within cutoff matching fuzzily.
+
+        status is "exact", "prefix" or "fuzzy" with a single ID, "ambiguous" with
+        the competing IDs, or "unmatched".
+        """
+        key = normalise_name(name)
+        if not key:
+            return "unmatched", [], None
+        ids = self.ids(key)
+        if ids:
+            return ("exact" if len(ids) == 1 else "ambiguous"), ids, key
+
+        if len(key) >= MIN_PREFIX:
+            matches = self.prefix(key)
+            ids = _distinct(i for match in matches for i in self.ids(match))
+            if len(ids) == 1:
+                return "prefix", ids, matches[0]
+            if ids:
+                return "ambiguous", ids, None
+
+        scored = self.fuzzy(key, cutoff)
+        if scored:
+            best = scored[0][0]
+            tied = [match for score, match in scored if score == best]
+            ids = _distinct(i for match in tied for i in self.ids(match))
+            if len(ids) == 1:
+                return "fuzzy", ids, tied[0]
+            return "ambiguous", ids, None
+        return "unmatched", [], None
+
+
+def _distinct(values):
+    return list(dict.fromkeys(values))
+
+
+def resolve_food_ids(food_log, food_index, name_index, cutoff=FUZZY_CUTOFF):
+    """Food_Data_ID of every Food Log row, filling in rows without a valid ID by name.
+
+    Rows that need an ID (not manual, ID missing from Food Data) are looked up in
+    one pass over their distinct names (fuzzy matches within cutoff). Returns (ids, report): the IDs as a Series
+    over the log (unresolved rows keep what they had), and what was matched how,
+    with the sheet rows of ambiguous and unmatched names ("matched" counts rows).
+    """
+    ids = food_log["Food_Data_ID"].astype(str).str.strip()
+    report = {"matched": 0, "exact": 0, "prefix": {}, "fuzzy": {}, "ambiguous": {}, "unmatched": {}}
+    if name_index is None or food_log.empty:
+        return ids, report
+
+    # (rows with a blank Value are skipped by the engine anyway)
+    has_value = food_log["Value"].astype(str).str.strip() != ""
+    missing = ~is_manual(food_log) & has_value & ~ids.isin(food_index.index)
+    if not missing.any():
+        return ids, report
+
+    names = food_log.loc[missing, "Food"].astype(object).map(normalise_name)
+    lookups = {name: name_index.lookup(name, cutoff) for name in names.unique()}
+    resolved = ids.copy()
+    for name, rows in names.groupby(names, sort=False).groups.items():
+        status, candidates, match = lookups[name]
+        sheet_rows = [row + 2 for row in rows]  # header row + 1-based
+        if status == "exact":
+            report["exact"] += len(rows)
+        elif status in ("prefix", "fuzzy"):
+            report[status][name] = (match, candidates[0], len(rows))
+        elif status == "ambiguous":
+            report["ambiguous"][name] = (candidates, sheet_rows)
+        else:
+            report["unmatched"][name] = sheet_rows
+        if status in ("exact", "prefix", "fuzzy"):
+            resolved.loc[rows] = candidates[0]
+            report["matched"] += len(rows)
+    return resolved, report
+
+
+def _rows(rows):
+    return ", ".join(str(r) for r in rows[:REPORT_ROWS]) + (", ..." if len(rows) > REPORT_ROWS else "")
+
+
+def print_name_report(report):
+    """Print what the name lookup did, one line per distinct name rather than per row."""
+    prefix = sum(n for _, _, n in report["prefix"].values())
+    fuzzy = sum(n for _, _, n in report["fuzzy"].values())
+    if report["matched"]:
+        print(f"🔎 Food Log: {report['matched']} rows without a Food_Data_ID matched by name "
+              f"({report['exact']} exact, {prefix} by prefix, {fuzzy} fuzzy)")
+    for kind in ("prefix", "fuzzy"):
+        for name, (match, food_id, count) in report[kind].items():
+            print(f"🔎 '{name}' → '{match}' (ID {food_id}, {kind} match, {count} rows)")
+    for name, (candidates, rows) in report["ambiguous"].items():
+        shown = ", ".join(candidates[:REPORT_CANDIDATES]) + (", ..." if len(candidates) > REPORT_CANDIDATES else "")
+        print(f"⚠️ Ambiguous food '{name}' could be IDs {shown} — set Food_Data_ID (rows {_rows(rows)})")
+    for name, rows in report["unmatched"].items():
+        print(f"⚠️ No match found for '{name}' — check name or alias (rows {_rows(rows)})")
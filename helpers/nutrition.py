@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+from .schema import FOOD_DATA, parse_frame
+
+# Master table columns, in the order the Food Log nutrition cells are written (G:J then M:O)
+NUTRIENT_COLUMNS = ["Kcal", "Protein (g)", "Carb (g)", "Fat (g)", "Sat Fat (g)", "Fibre (g)", "Sugar (g)"]
+# Food Log header and 1-based sheet column holding each of those values
+FOOD_LOG_OUTPUT_COLUMNS = [("Kcal", 7), ("P", 8), ("C", 9), ("F", 10), ("Saturated Fat g", 13), ("Fibre g", 14), ("Sugar g", 15)]
+
+# Food Data column -> master column, and the decimals each one is rounded to
+_REFERENCE_COLUMNS = [
+    ("Kcal", "Kcal", 1),
+    ("Protein g", "Protein (g)", 1),
+    ("Carb g", "Carb (g)", 1),
+    ("Fat g", "Fat (g)", 1),
+    ("Saturated Fat g", "Sat Fat (g)", 0),
+    ("Fibre g", "Fibre (g)", 0),
+    ("Sugar g", "Sugar (g)", 0),
+]
+# Food Log column feeding each master column on manual rows
+_MANUAL_COLUMNS = [("Kcal", "Kcal"), ("P", "Protein (g)"), ("C", "Carb (g)"), ("F", "Fat (g)")]
+_MANUAL_SAFE_COLUMNS = [("Saturated Fat g", "Sat Fat (g)"), ("Fibre g", "Fibre (g)"), ("Sugar g", "Sugar (g)")]
+
+# Placeholder written back for manual and skipped rows (None leaves the sheet cell untouched)
+EMPTY_ROW = [None] * 8
+
+
+def safe_float(value, default=0.0):
+    try:
+        return float(value or default)
+    except (TypeError, ValueError):
+        return default
+
+
+def _map_unique(values, func):
+    """Apply func once per distinct value of a Series and broadcast the results back."""
+    codes, uniques = pd.factorize(values)
+    mapped = [func(u) for u in uniques]
+    mapped.append(func(np.nan))  # factorize codes missing values as -1
+    return np.array(mapped, dtype=object)[codes]
+
+
+def _try_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _column(df, name, default=""):
+    """Return a column, or a constant Series when the sheet does not have it (mirrors row.get)."""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index, dtype=object)
+
+
+def _shown_dates(dates):
+    """Dates as the sheet writes them, for messages."""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.dt.strftime("%d/%m/%Y").fillna("").values
+    return dates.values
+
+
+def prepare_food_data(food_data):
+    """Parse Food Data with its schema: trimmed headers, text IDs, Food/Alias normalised like Food Log names."""
+    return parse_frame(food_data, FOOD_DATA, "Food Data")
+
+
+def is_manual(food_log):
+    """Rows whose nutrition is typed in by hand (or left blank) rather than looked up."""
+    manual_input = food_log["Manual Input"]
+    return (manual_input == "Y") | ((food_log["Value"] == "") & (manual_input == ""))
+
+
+def build_food_index(food_data):
+    """Index the Food Data table by stripped ID, keeping the first row for duplicated IDs."""
+    keys = food_data["ID"].astype(str).str.strip()
+    index = food_data.assign(_key=keys.values).drop_duplicates("_key", keep="first")
+    return index.set_index("_key")
+
+
+def compute_nutrition(food_log, food_data=None, food_index=None):
+    """Compute the nutrition of every Food Log row in one indexed join against Food Data.
+
+    Returns (nutrition_to_append, records): the per-row values written back to the
+    Food Log, and a DataFrame of the rows that count towards the daily totals.
+    Rows with an invalid Value or an unknown Food_Data_ID are left out of
+    nutrition_to_append, exactly like the original loop, so the caller's length
+    check still catches shifted rows.
+    """
+    if food_index is None:
+        food_index = build_food_index(food_data)
+
+    n = len(food_log)
+    food_name = food_log["Food"].values
+    dates = food_log["Date"].values
+    shown_dates = _shown_dates(food_log["Date"])
+    messages = []
+
+    manual = is_manual(food_log).values
+
+    value_str = _column(food_log, "Value").astype(str).str.strip().values
+    blank = ~manual & (value_str == "")
+    parsed_value = _map_unique(pd.Series(value_str), _try_float)
+    invalid = ~manual & ~blank & np.equal(parsed_value, None)
+
+    for pos in np.flatnonzero(blank):
+        messages.append((pos, 0, f"⚠️ Skipping: No value for '{food_name[pos]}' on {shown_dates[pos]}"))
+    for pos in np.flatnonzero(invalid):
+        messages.append((pos, 0, f"⚠️ Skipping: Invalid number '{value_str[pos]}' for '{food_name[pos]}' on {shown_dates[pos]}"))
+
+    computed = ~manual & ~blank & ~invalid
+    value = np.zeros(n)
+    value[computed] = parsed_value[computed].astype(float)
+
+    # Apply conversion if available
+    conversion_str = _column(food_log, "Conversion").astype(str).str.strip().values
+    has_conversion = computed & (conversion_str != "")
+    parsed_conversion = _map_unique(pd.Series(conversion_str), _try_float)
+    bad_conversion = has_conversion & np.equal(parsed_conversion, None)
+    good_conversion = has_conversion & ~bad_conversion
+    value[good_conversion] *= parsed_conversion[good_conversion].astype(float)
+    for pos in np.flatnonzero(bad_conversion):
+        messages.append((pos, 1, f"⚠️ Invalid conversion factor '{conversion_str[pos]}' for {food_name[pos]}, ignoring."))
+
+    food_id = food_log["Food_Data_ID"].astype(str).str.strip().values
+    found = computed & (pd.Index(food_index.index).get_indexer(food_id) >= 0)
+    unmatched = np.flatnonzero(computed & ~found)
+
+    for _, _, message in sorted(messages, key=lambda m: (m[0], m[1])):
+        print(message)
+    # One line for all of them: the name lookup (food_names) reports which names failed
+    if len(unmatched):
+        names = list(dict.fromkeys(str(food_name[pos]) for pos in unmatched))
+        print(f"⚠️ No match found for {len(unmatched)} rows ({', '.join(repr(n) for n in names[:5])}"
+              f"{', ...' if len(names) > 5 else ''}) — check name or alias.")
+
+    # One lookup for every matched row, then column-wise arithmetic
+    hit = np.flatnonzero(found)
+    ref = food_index.loc[food_id[hit]]
+    per_unit = np.array([float(v) for v in ref["Per Unit"]], dtype=float)
+    if (per_unit == 0).any():
+        raise ZeroDivisionError("float division by zero")
+    factor = value[hit] / per_unit
+
+    out = {col: np.empty(n, dtype=object) for col in NUTRIENT_COLUMNS}
+    for source, target, decimals in _REFERENCE_COLUMNS:
+        parse = float if decimals == 1 else safe_float
+        reference = np.array([parse(v) for v in ref[source]], dtype=float)
+        out[target][hit] = [round(x, decimals) for x in (factor * reference).tolist()]
+
+    manual_pos = np.flatnonzero(manual)
+    for source, target in _MANUAL_COLUMNS:
+        out[target][manual_pos] = food_log[source].values[manual_pos]
+    for source, target in _MANUAL_SAFE_COLUMNS:
+        out[target][manual_pos] = _map_unique(_column(food_log, source, 0).iloc[manual_pos], safe_float)
+
+    # Per-row values for the Food Log, in sheet order
+    matched_rows = np.stack([out[col][hit] for col in NUTRIENT_COLUMNS], axis=1).tolist() if len(hit) else []
+    kept = manual | blank | found
+    nutrition_to_append = []
+    matched_iter = iter(matched_rows)
+    for is_found in found[kept]:
+        nutrition_to_append.append(next(matched_iter) if is_found else list(EMPTY_ROW))
+
+    record_pos = np.flatnonzero(manual | found)
+    if len(record_pos) == 0:
+        return nutrition_to_append, pd.DataFrame([])
+    columns = {"Date": dates[record_pos]}
+    columns.update({col: out[col][record_pos].tolist() for col in NUTRIENT_COLUMNS})
+    return nutrition_to_append, pd.DataFrame(columns)
+
+
+def daily_totals(records):
+    """Sum the per-row records into one row per date."""
+    if records.empty:
+        columns = {"Date": pd.Series(dtype="datetime64[ns]")}
+        columns.update({col: pd.Series(dtype=float) for col in NUTRIENT_COLUMNS})
+        return pd.DataFrame(columns)
+    all_records = records.copy()
+    if not pd.api.types.is_datetime64_any_dtype(all_records["Date"]):
+        all_records["Date"] = all_records["Date"].astype(str).str.strip()
+        all_records["Date"] = pd.to_datetime(all_records["Date"], format="%d/%m/%Y")
+    return all_records.groupby("Date").sum().reset_index()
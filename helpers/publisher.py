@@ -0,0 +1,62 @@
+import json
+import hashlib
+import pandas as pd
+from .backend import frame_rows
+from .schema import widen_floats
+from .checkpoint import STATE_VERSION, load_state
+from .sheet_writer import row_block_ranges, count_cells
+from .debug_util import debug
+
+
+def _row_hash(row):
+    # 6478.0 computed in memory and 6478 read back from the sheet are the same cell
+    row = [int(v) if isinstance(v, float) and v.is_integer() else v for v in row]
+    return hashlib.sha1(json.dumps(row, default=str).encode()).hexdigest()[:16]
+
+
+def publish_frame(plan, sheet, df, snapshot_file, incremental=False, sheet_rows=None):
+    """Plan writing df to the (url, sheet) worksheet, header on row 1, sending only rows changed since the last publish.
+
+    The snapshot file remembers the header and a hash per row of what was last
+    written; the plan saves it once its writes are through. With incremental=False,
+    or without a usable snapshot, the whole frame is written like set_with_dataframe;
+    otherwise changed rows are updated in place, new rows appended and rows left
+    over from a longer previous frame cleared.
+
+    Without a snapshot, sheet_rows() tells how many rows the sheet holds below its
+    header now (a rewrite does not shrink the sheet), so the rows past the new
+    frame are cleared too.
+    """
+    df = widen_floats(df)
+    rows = frame_rows(df, include_column_header=True)
+    header, body = [str(c) for c in rows[0]], rows[1:]
+    hashes = [_row_hash(row) for row in body]
+    snapshot = load_state(snapshot_file)
+
+    if not incremental or snapshot is None or snapshot["header"] != header:
+        plan.frame(sheet, rows)
+        written, ranges = len(rows) * len(header), 1
+        previous = snapshot["rows"] if snapshot else [None] * (sheet_rows() if sheet_rows is not None else 0)
+        debug(f"Tactical DB: full rewrite of {len(body)} rows")
+    else:
+        previous = snapshot["rows"]
+        changed = [i for i, h in enumerate(hashes[:len(previous)]) if h != previous[i]]
+        updates = row_block_ranges(header, [(i + 2, dict(zip(header, body[i]))) for i in changed], header)
+        plan.update(sheet, updates, value_input_option="USER_ENTERED")
+
+        new_rows = body[len(previous):]
+        if new_rows:
+            plan.append(sheet, new_rows, start_row=len(previous) + 2, value_input_option="USER_ENTERED")
+        written, ranges = count_cells(updates) + len(new_rows) * len(header), len(updates) + bool(new_rows)
+        debug(f"Tactical DB: {len(changed)} rows updated, {len(new_rows)} appended")
+
+    # Blank out rows a longer previous publish left behind
+    if len(previous) > len(body):
+        blank = {name: "" for name in header}
+        clears = row_block_ranges(header, [(i + 2, blank) for i in range(len(body), len(previous))], header)
+        plan.update(sheet, clears, value_input_option="USER_ENTERED")
+        written, ranges = written + count_cells(clears), ranges + len(clears)
+        debug(f"Tactical DB: {len(previous) - len(body)} leftover rows cleared")
+
+    plan.save_after(snapshot_file, {"version": STATE_VERSION, "pandas": pd.__version__, "header": header, "rows": hashes})
+    return written, ranges
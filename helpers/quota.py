@@ -0,0 +1,93 @@
+import time
+import random
+import threading
+from .debug_util import debug
+
+# Status codes worth retrying: per-minute quota exhausted, or a transient server error
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Sheets API read quota per user (60 requests per minute by default; READ_QUOTA_PER_MINUTE in the config)
+READ_QUOTA_PER_MINUTE = 60
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.full_rate = self.rate = rate
+        self.full_capacity = self.capacity = capacity
+        self.parts = 1
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def configure(self, rate, capacity):
+        """Change the rate and burst (a share() split still applies)."""
+        with self.lock:
+            self.full_rate, self.full_capacity = rate, capacity
+            self._split()
+
+    def share(self, parts):
+        """Keep only 1/parts of the rate and burst, for one of `parts` processes sharing a quota."""
+        with self.lock:
+            self.parts = parts
+            self._split()
+
+    def _split(self):
+        self.rate = self.full_rate / self.parts
+        self.capacity = max(1, self.full_capacity / self.parts)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _read_limits(per_minute):
+    # Half the quota is available as a burst and the other half refills over the minute,
+    # so no 60-second window can go over the quota
+    return per_minute / 2 / 60.0, max(1, per_minute // 2)
+
+
+# Shared by every concurrent read in the process (paced for the configured quota by open_session)
+READ_LIMITER = TokenBucket(*_read_limits(READ_QUOTA_PER_MINUTE))
+
+
+def set_read_quota(per_minute):
+    """Pace READ_LIMITER for a quota of per_minute reads."""
+    READ_LIMITER.configure(*_read_limits(per_minute))
+
+
+def _status(error):
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def with_backoff(func, *args, retries=5, base_delay=2.0, max_delay=64.0, limiter=None, **kwargs):
+    """Call func, retrying quota (429) and 5xx errors with jittered exponential backoff.
+
+    The delay before retry n is drawn uniformly up to base_delay * 2**n (capped at
+    max_delay), so concurrent callers hitting the quota together do not retry in
+    lockstep. With a limiter, every attempt first takes a token from it.
+    """
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            status = _status(e)
+            if status not in RETRY_STATUS or attempt == retries:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            debug(f"⏳ Sheets API returned {status}, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+            time.sleep(delay)
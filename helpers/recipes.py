@@ -0,0 +1,128 @@
+import json
+import hashlib
+import pandas as pd
+from .schema import RECIPES, parse_frame
+from .nutrition import safe_float
+from .checkpoint import fingerprint_food_data
+
+# Food Data columns a recipe row carries, like any other food: its yield and nutrients for that yield
+RECIPE_FIELDS = ["Per Unit", "Kcal", "Protein g", "Carb g", "Fat g", "Saturated Fat g", "Fibre g", "Sugar g"]
+# Parsed strictly, like the nutrition engine does (the rest count blanks and text as 0)
+_STRICT_FIELDS = ["Per Unit", "Kcal", "Protein g", "Carb g", "Fat g"]
+
+
+class RecipeError(ValueError):
+    pass
+
+
+def _first(values):
+    """First non-blank cell of a recipe's rows ('' when there is none)."""
+    values = [v for v in values if str(v).strip() not in ("", "nan")]
+    return values[0] if values else ""
+
+
+def _number(value, field, where, strict=None):
+    if strict is None:
+        strict = field in _STRICT_FIELDS
+    if strict:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise RecipeError(f"{where}: '{field}' is not a number ({value!r})")
+    return safe_float(value)
+
+
+def _fingerprint(rows, ingredient_hashes):
+    payload = [rows.astype(str).values.tolist(), ingredient_hashes]
+    return hashlib.sha1(json.dumps(payload).encode()).hexdigest()[:16]
+
+
+def build_recipes(recipe_rows, food_index, cache=None):
+    """Food rows for the recipes, each computed once from its ingredients.
+
+    recipe_rows is the Recipes sheet: one row per ingredient with Recipe ID,
+    Recipe (name), Alias and Per Unit (the yield Food Log Values are measured
+    in; blank means the sum of the ingredient amounts) on any of its rows, and
+    Food_Data_ID, Quantity (in the ingredient's own unit) and Conversion. An
+    ingredient can be another recipe.
+
+    cache holds {Recipe ID: {"fingerprint", "values"}} from an earlier call: a
+    recipe whose rows and ingredient rows (Food Data or nested recipe) hash the
+    same is reused rather than recomputed. Returns (DataFrame with ID, Food,
+    Alias and RECIPE_FIELDS, new cache, number recomputed). Recipes with unknown
+    ingredients, an ID already in Food Data or a cycle are reported and skipped.
+    """
+    cache = cache or {}
+    recipes = parse_frame(recipe_rows, RECIPES, "Recipes")
+    if recipes.empty or "Recipe ID" not in recipes.columns:
+        return pd.DataFrame(columns=["ID", "Food", "Alias"] + RECIPE_FIELDS), {}, 0
+    recipes = recipes[recipes["Recipe ID"] != ""]
+    groups = {recipe_id: rows for recipe_id, rows in recipes.groupby("Recipe ID", sort=False)}
+    food_hashes = fingerprint_food_data(food_index)
+
+    done, new_cache, recomputed = {}, {}, [0]
+
+    def resolve(recipe_id, path):
+        if recipe_id in done:
+            return done[recipe_id]
+        if recipe_id in path:
+            raise RecipeError(f"Recipe {recipe_id} contains itself ({' → '.join(path + [recipe_id])})")
+        if recipe_id in food_index.index:
+            raise RecipeError(f"Recipe ID {recipe_id} is also a Food Data ID")
+        rows = groups[recipe_id]
+        ingredients = rows["Food_Data_ID"].tolist()
+        hashes = []
+        for ingredient in ingredients:
+            if ingredient in groups:
+                hashes.append(resolve(ingredient, path + [recipe_id])["fingerprint"])
+            elif ingredient in food_hashes:
+                hashes.append(food_hashes[ingredient])
+            else:
+                raise RecipeError(f"Recipe {recipe_id}: unknown ingredient ID {ingredient!r}")
+        fingerprint = _fingerprint(rows, hashes)
+        cached = cache.get(recipe_id)
+        if cached is not None and cached["fingerprint"] == fingerprint:
+            entry = cached
+        else:
+            entry = {"fingerprint": fingerprint, "values": _compute(recipe_id, rows, done, food_index)}
+            recomputed[0] += 1
+        done[recipe_id] = entry
+        return entry
+
+    out = []
+    for recipe_id, rows in groups.items():
+        try:
+            entry = resolve(recipe_id, [])
+        except RecipeError as e:
+            print(f"⚠️ Skipping recipe: {e}")
+            continue
+        new_cache[recipe_id] = entry
+        out.append({"ID": recipe_id, "Food": _first(rows.get("Recipe", [])), "Alias": _first(rows.get("Alias", [])),
+                    **entry["values"]})
+    return pd.DataFrame(out, columns=["ID", "Food", "Alias"] + RECIPE_FIELDS), new_cache, recomputed[0]
+
+
+def _compute(recipe_id, rows, done, food_index):
+    """Nutrients of one batch of a recipe, and its yield."""
+    totals = dict.fromkeys(RECIPE_FIELDS[1:], 0.0)
+    amount_total = 0.0
+    for _, row in rows.iterrows():
+        where = f"Recipe {recipe_id}, ingredient {row['Food_Data_ID']}"
+        amount = _number(row.get("Quantity", ""), "Quantity", where, strict=True)
+        conversion = str(row.get("Conversion", "")).strip()
+        if conversion not in ("", "nan"):
+            amount *= _number(conversion, "Conversion", where, strict=True)
+        ingredient = row["Food_Data_ID"]
+        ref = done[ingredient]["values"] if ingredient in done else food_index.loc[ingredient]
+        per_unit = _number(ref["Per Unit"], "Per Unit", where)
+        if per_unit == 0:
+            raise RecipeError(f"{where}: Per Unit is 0")
+        for field in totals:
+            totals[field] += amount / per_unit * _number(ref.get(field, ""), field, where)
+        amount_total += amount
+    per_unit = str(_first(rows.get("Per Unit", []))).strip()
+    values = {"Per Unit": _number(per_unit, "Per Unit", f"Recipe {recipe_id}") if per_unit else amount_total}
+    if values["Per Unit"] == 0:
+        raise RecipeError(f"Recipe {recipe_id}: its yield (Per Unit) is 0")
+    values.update(totals)
+    return values
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+from .quota import READ_LIMITER, with_backoff
+
+# Column kinds:
+#   text     stripped string ('' for blanks)
+#   lower    stripped, lower-cased string
+#   category stripped string stored as a categorical
+#   name     stripped, lower-cased categorical (food names)
+#   float    float64 number
+#   float32  float32 number (read-only analytics columns)
+#   date     dd/mm/YYYY date as datetime64
+#   steps    step count, "9.5k" meaning 9500, as float32
+#   raw      left exactly as the sheet returned it
+#
+# Columns missing from a sheet are ignored; columns not listed are left as they are.
+
+# Food Data numbers stay raw: the nutrition engine parses them itself (strictly for
+# Kcal/P/C/F, leniently for the rest) and its rounding decides what reaches the Food Log.
+FOOD_DATA = {
+    "ID": "text",
+    "Food": "name",
+    "Alias": "name",
+}
+
+# Recipes: one row per ingredient; the amounts stay raw like the Food Data numbers.
+RECIPES = {
+    "Recipe ID": "text",
+    "Recipe": "name",
+    "Alias": "name",
+    "Food_Data_ID": "text",
+}
+
+# Value / Conversion stay text so the engine can tell blank, invalid and numeric apart.
+FOOD_LOG = {
+    "Date": "date",
+    "Food": "name",
+    "Manual Input": "category",
+    "Unit": "text",
+    "Value": "text",
+    "Conversion": "text",
+    "Kcal": "float",
+    "P": "float",
+    "C": "float",
+    "F": "float",
+    "Food_Data_ID": "text",
+    "Notes": "text",
+    "Saturated Fat g": "float",
+    "Fibre g": "float",
+    "Sugar g": "float",
+}
+
+MASTER_TABLE = {
+    "Date": "date",
+    "Phase": "category",
+    "Kcal": "float32",
+    "Protein (g)": "float32",
+    "Carb (g)": "float32",
+    "Fat (g)": "float32",
+    "Sat Fat (g)": "float32",
+    "Fibre (g)": "float32",
+    "Sugar (g)": "float32",
+    "Notes": "text",
+}
+
+ACTIVITY_LOG = {
+    "Date": "date",
+    "Menstruation": "text",
+    "Steps": "steps",
+    "Load-bearing": "text",
+    "Bedtime": "text",
+    "Wake-up time": "text",
+    "Poop time": "text",
+}
+
+DATE_FORMAT = "%d/%m/%Y"
+# Sheet rows listed per column in the parse report
+REPORT_ROWS = 5
+
+
+def _text(values):
+    return values.where(values.notna(), "").astype(str).str.strip()
+
+
+def _number(text):
+    return pd.to_numeric(text, errors="coerce")
+
+
+def _steps(text):
+    thousands = text.str.endswith("k")
+    number = _number(text.where(~thousands, text.str[:-1]))
+    return number.where(~thousands, number * 1000)
+
+
+def _date(values, text):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(text, format=DATE_FORMAT, errors="coerce")
+
+
+def _parse(values, kind):
+    """Parsed column and the mask of non-blank cells that failed to parse."""
+    if kind == "raw":
+        return values, None
+    text = _text(values)
+    if kind == "text":
+        return text, None
+    if kind == "lower":
+        return text.str.lower(), None
+    if kind == "category":
+        return text.astype("category"), None
+    if kind == "name":
+        return text.str.lower().astype("category"), None
+    if kind == "date":
+        parsed = _date(values, text)
+    elif kind == "steps":
+        parsed = _steps(text).astype(np.float32)
+    elif kind in ("float", "float32"):
+        parsed = _number(text).astype(np.float64 if kind == "float" else np.float32)
+    else:
+        raise ValueError(f"Unknown column kind {kind!r}")
+    return parsed, parsed.isna() & (text != "")
+
+
+def parse_frame(df, schema, sheet="sheet"):
+    """Parse every column of a sheet's DataFrame once, according to its schema.
+
+    Header names are stripped first. Cells that are not blank but cannot be parsed
+    become NaN/NaT and are reported with their sheet row (index + 2, header row
+    + 1-based); the report is also kept in df.attrs["parse_errors"].
+    """
+    df = df.copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    errors = {}
+    for column, kind in schema.items():
+        if column not in df.columns:
+            continue
+        df[column], failed = _parse(df[column], kind)
+        if failed is not None and failed.any():
+            errors[column] = (df.index[failed.values] + 2).tolist()
+
+    for column, rows in errors.items():
+        shown = ", ".join(str(r) for r in rows[:REPORT_ROWS]) + (", ..." if len(rows) > REPORT_ROWS else "")
+        print(f"⚠️ {sheet}: {len(rows)} '{column}' cells could not be parsed (rows {shown})")
+    df.attrs["parse_errors"] = errors
+    return df
+
+
+def load_sheet(ws, schema, sheet="sheet"):
+    """Read a worksheet with get_all_records (through the read limiter) and parse it with its schema."""
+    return parse_frame(pd.DataFrame(with_backoff(ws.get_all_records, limiter=READ_LIMITER)), schema, sheet)
+
+
+def widen_floats(df):
+    """Copy of df with float32 columns widened to float64 for writing.
+
+    Each value goes through its shortest decimal, so a Kcal of 16.3 held as
+    float32 is written as 16.3 rather than 16.299999237060547.
+    """
+    narrow = [column for column, dtype in df.dtypes.items() if dtype == np.float32]
+    if not narrow:
+        return df
+    df = df.copy()
+    for column in narrow:
+        df[column] = df[column].to_numpy().astype(str).astype(np.float64)
+    return df
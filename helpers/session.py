@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+from .quota import READ_LIMITER, READ_QUOTA_PER_MINUTE, set_read_quota, with_backoff
+from .trace import tracer, span
+from .debug_util import debug
+from .config import flag
+
+# Worksheets read at the same time by default (FETCH_WORKERS in the config; the read limiter still paces the requests)
+FETCH_WORKERS = 4
+
+
+def _span_name(label, name):
+    # worksheets are keyed by (url, sheet)
+    return f"{label} {' / '.join(name) if isinstance(name, tuple) else name}"
+
+
+class Session:
+    """One authorized backend plus the spreadsheets and worksheets already opened with it.
+
+    Stages running in the same process share a Session so each workbook is opened
+    once, and hand DataFrames to each other through `frames` instead of re-reading
+    what the previous stage just wrote.
+    """
+
+    def __init__(self, backend, workers=FETCH_WORKERS):
+        self.backend = backend
+        self.workers = workers
+        self.frames = {}
+        self._workbooks = {}
+        self._worksheets = {}
+
+    def workbook(self, url):
+        if url not in self._workbooks:
+            self._workbooks[url] = with_backoff(self.backend.open_by_url, url, limiter=READ_LIMITER)
+        else:
+            debug(f"♻️ Reusing opened spreadsheet {url}")
+        return self._workbooks[url]
+
+    def worksheet(self, url, sheet):
+        key = (url, sheet)
+        if key not in self._worksheets:
+            self._worksheets[key] = with_backoff(self.workbook(url).worksheet, sheet, limiter=READ_LIMITER)
+        return self._worksheets[key]
+
+    def fetch(self, tasks, label="read"):
+        """Run independent read tasks at the same time; returns {name: result}.
+
+        tasks maps a name to a no-argument callable, timed as a "<label> <name>"
+        span, so the whole fetch takes about as long as the slowest read instead of
+        the sum of them. The API calls inside a task go through the shared read
+        limiter and with_backoff themselves.
+        """
+        if not tasks:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(tasks))) as pool:
+            futures = {name: pool.submit(tracer.inherit(self._timed), _span_name(label, name), task) for name, task in tasks.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    @staticmethod
+    def _timed(name, task):
+        with span(name):
+            return task()
+
+    def open(self, sheets, workbooks=()):
+        """Open the given (url, sheet) worksheets, plus any extra workbook urls, concurrently.
+
+        Returns the worksheets in the order given.
+        """
+        wanted = list(workbooks) + [url for url, _ in sheets]
+        urls = list(dict.fromkeys(url for url in wanted if url not in self._workbooks))
+        self._workbooks.update(self.fetch({url: lambda url=url: with_backoff(self.backend.open_by_url, url, limiter=READ_LIMITER) for url in urls}, label="open"))
+        missing = [key for key in dict.fromkeys(sheets) if key not in self._worksheets]
+        opened = self.fetch({key: lambda key=key: with_backoff(self._workbooks[key[0]].worksheet, key[1], limiter=READ_LIMITER)
+                             for key in missing}, label="open")
+        self._worksheets.update(opened)
+        return [self._worksheets[key] for key in sheets]
+
+
+def open_session(config=None):
+    """Authorize the configured backend (timed as the "auth" span) and wrap it in a Session.
+
+    READ_QUOTA_PER_MINUTE, FETCH_WORKERS and TRACE_BYTES are taken from the config here. The
+    tracer follows the backend's API usage from then on.
+    """
+    from .backend import open_backend
+    config = config or {}
+    set_read_quota(int(config.get("READ_QUOTA_PER_MINUTE") or READ_QUOTA_PER_MINUTE))
+    with span("auth"):
+        backend = open_backend()
+    backend.count_bytes = flag(config, "TRACE_BYTES")
+    tracer.attach(backend)
+    return Session(backend, workers=int(config.get("FETCH_WORKERS") or FETCH_WORKERS))
@@ -0,0 +1,117 @@
+import bisect
+import pandas as pd
+from gspread.utils import rowcol_to_a1, numericise_all
+from .quota import READ_LIMITER, with_backoff
+from .schema import DATE_FORMAT, parse_frame
+from .debug_util import debug
+
+# Sheet rows fetched per request when a worksheet is read in pages (PAGE_ROWS in the config)
+PAGE_ROWS = 2000
+
+
+def page_frame(header, values, first_row):
+    """DataFrame of sheet rows under `header`, numbers numericised and indexed like get_all_records frames (sheet row - 2)."""
+    width = len(header)
+    rows = [numericise_all((list(row) + [""] * width)[:width]) for row in values]
+    return pd.DataFrame(rows, columns=header, index=pd.RangeIndex(first_row - 2, first_row - 2 + len(rows)))
+
+
+def read_pages(ws, schema, sheet="sheet", page_rows=PAGE_ROWS, header=None):
+    """Read a worksheet below its header in pages of page_rows rows, parsing each one with its schema.
+
+    Yields one DataFrame per page, indexed by sheet row - 2 like load_sheet, so
+    only a page is held in memory at a time. Every request goes through the
+    shared read limiter.
+    """
+    if header is None:
+        header = with_backoff(ws.row_values, 1, limiter=READ_LIMITER)
+    last_col = rowcol_to_a1(1, max(len(header), 1))[:-1]
+    first = 2
+    while True:
+        last = first + page_rows - 1
+        values = with_backoff(ws.get_values, f"A{first}:{last_col}{last}", limiter=READ_LIMITER)
+        # (a short page may only end in a run of blank rows, so only an empty page ends the sheet)
+        if not values:
+            return
+        page = parse_frame(page_frame(header, values, first), schema, sheet)
+        debug(f"📄 {sheet}: rows {first}-{first + len(values) - 1}")
+        yield page
+        first = last + 1
+
+
+def _column_letter(col):
+    return rowcol_to_a1(1, col)[:-1]
+
+
+def _read(ws, range_name):
+    return with_backoff(ws.get_values, range_name, limiter=READ_LIMITER)
+
+
+def _whole(ws, schema, sheet, since, until, whole):
+    frame = whole() if whole is not None else parse_frame(
+        pd.DataFrame(with_backoff(ws.get_all_records, limiter=READ_LIMITER)), schema, sheet)
+    rows = frame.attrs.get("sheet_rows", len(frame))
+    dates = frame["Date"] if "Date" in frame.columns else pd.Series(pd.NaT, index=frame.index)
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates.astype(str).str.strip(), format=DATE_FORMAT, errors="coerce")
+    inside = pd.Series(True, index=frame.index)
+    if since is not None:
+        inside &= ~(dates < pd.Timestamp(since))
+    if until is not None:
+        inside &= ~(dates > pd.Timestamp(until))
+    before = dates[dates < pd.Timestamp(since)] if since is not None else dates.iloc[:0]
+    frame = frame[inside]
+    frame.attrs.update(sheet_rows=rows, windowed=False, previous_date=before.max() if len(before) else None)
+    return frame
+
+
+def read_window(ws, schema, sheet="sheet", since=None, until=None, whole=None):
+    """Rows of a date-sorted worksheet between since and until (inclusive), without reading the rest.
+
+    Only the header and the Date column are read first; the span of rows inside
+    the window is found by binary search over the dates and just those rows are
+    fetched (through the end of the sheet when until is None, so undated rows at
+    the bottom come along too). When the Date column is not in date order, or
+    holds dates that do not parse, the whole sheet is read and filtered instead:
+    with get_all_records, or whole() when given (a parsed frame).
+
+    The frame is parsed with its schema and indexed like load_sheet (sheet row - 2).
+    attrs: "sheet_rows" (rows below the header), "windowed" (whether the range read
+    was used) and "previous_date" (last date above the window, None if there is none).
+    """
+    header = with_backoff(ws.row_values, 1, limiter=READ_LIMITER)
+    names = [str(name).strip() for name in header]
+    if "Date" not in names:
+        return _whole(ws, schema, sheet, since, until, whole)
+    letter = _column_letter(names.index("Date") + 1)
+    column = [row[0] if row else "" for row in _read(ws, f"{letter}2:{letter}")]
+    text = pd.Series(column, dtype=object).astype(str).str.strip()
+    dates = pd.to_datetime(text, format=DATE_FORMAT, errors="coerce")
+    valid = dates.notna()
+    if (text[~valid] != "").any() or not dates[valid].is_monotonic_increasing:
+        debug(f"↕️ {sheet} is not sorted by date, reading it whole")
+        return _whole(ws, schema, sheet, since, until, whole)
+
+    # Positions (sheet row - 2) of the dated rows, and the dated rows inside the window
+    positions = list(valid[valid].index)
+    ordered = list(dates[valid])
+    first = bisect.bisect_left(ordered, pd.Timestamp(since)) if since is not None else 0
+    last = bisect.bisect_right(ordered, pd.Timestamp(until)) if until is not None else len(ordered)
+    if since is None:
+        top = 2
+    elif first < len(ordered):
+        top = positions[first] + 2  # +2 => header row + 1-based
+    else:
+        top = positions[-1] + 3 if positions else 2
+    if until is None:
+        values = _read(ws, f"A{top}:{_column_letter(len(header))}")
+    elif first < last:
+        values = _read(ws, f"A{top}:{_column_letter(len(header))}{positions[last - 1] + 2}")
+    else:
+        values = []
+    # (rows below the last date only show up in a read through the end of the sheet)
+    rows = max(len(column), top - 2 + len(values)) if until is None else len(column)
+    frame = parse_frame(page_frame(header, values, top), schema, sheet)
+    frame.attrs.update(sheet_rows=rows, windowed=True, previous_date=ordered[first - 1] if first else None)
+    debug(f"📅 {sheet}: {len(frame)} of {rows} rows read for the window")
+    return frame
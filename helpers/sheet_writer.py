@@ -0,0 +1,124 @@
+import json
+from gspread.utils import rowcol_to_a1
+
+# Stay well under the Sheets API request size limit (2 MB recommended per request)
+MAX_REQUEST_BYTES = 1_500_000
+
+
+def same_cell(old, new):
+    """True when writing `new` over `old` would not change what the sheet shows.
+
+    None means "leave the cell alone" (the API skips null values), and numbers
+    compare by value so 16 read back from the sheet matches a freshly computed 16.0.
+    """
+    if new is None:
+        return True
+    if old is None:
+        old = ""
+    if isinstance(old, (int, float)) and isinstance(new, (int, float)) and not isinstance(new, bool):
+        return float(old) == float(new)
+    return str(old) == str(new)
+
+
+def _spans(columns, changed):
+    """Runs of adjacent sheet columns whose cells changed, as (first_pos, last_pos) into `columns`."""
+    spans = []
+    start = None
+    for pos, is_changed in enumerate(changed):
+        if is_changed and start is not None and columns[pos] == columns[pos - 1] + 1:
+            continue
+        if start is not None:
+            spans.append((start, pos - 1))
+            start = None
+        if is_changed:
+            start = pos
+    if start is not None:
+        spans.append((start, len(changed) - 1))
+    return spans
+
+
+def changed_ranges(row_numbers, columns, old_rows, new_rows):
+    """Smallest set of rectangles covering the cells where new_rows differ from old_rows.
+
+    row_numbers are the 1-based sheet rows of each value row and columns the 1-based
+    sheet columns of each value; changed cells next to each other are merged
+    sideways first, then identical column spans on consecutive rows are stacked.
+    Returns batch_update entries ({"range", "values"}).
+    """
+    open_blocks = {}  # (first_pos, last_pos) -> [first_row, last_row, values]
+    blocks = []
+    for ws_row, old, new in zip(row_numbers, old_rows, new_rows):
+        changed = [not same_cell(o, n) for o, n in zip(old, new)]
+        spans = _spans(columns, changed)
+        for span in list(open_blocks):
+            if span not in spans or open_blocks[span][1] != ws_row - 1:
+                blocks.append((span, open_blocks.pop(span)))
+        for first, last in spans:
+            block = open_blocks.get((first, last))
+            if block is None:
+                open_blocks[(first, last)] = block = [ws_row, ws_row, []]
+            block[1] = ws_row
+            block[2].append(list(new[first:last + 1]))
+    blocks.extend(open_blocks.items())
+
+    updates = []
+    for (first, last), (first_row, last_row, values) in sorted(blocks, key=lambda b: (b[1][0], b[0][0])):
+        a1 = f"{rowcol_to_a1(first_row, columns[first])}:{rowcol_to_a1(last_row, columns[last])}"
+        updates.append({"range": a1, "values": values})
+    return updates
+
+
+def count_cells(updates):
+    return sum(len(row) for u in updates for row in u["values"])
+
+
+def row_block_ranges(header, rows, cols):
+    """batch_update entries writing `cols` for whole rows at once.
+
+    rows is a list of (sheet_row, {column name: value}). Columns adjacent in the
+    header share one range, and consecutive sheet rows are stacked into one
+    multi-row block, instead of one A1 range per cell.
+    """
+    col_idx = {name: i + 1 for i, name in enumerate(header)}
+    positions = sorted(col_idx[c] for c in cols if c in col_idx)
+    runs = []
+    for pos in positions:
+        if runs and pos == runs[-1][-1] + 1:
+            runs[-1].append(pos)
+        else:
+            runs.append([pos])
+    names = {i: name for name, i in col_idx.items()}
+
+    updates = []
+    rows = sorted(rows, key=lambda r: r[0])
+    start = 0
+    while start < len(rows):
+        end = start
+        while end + 1 < len(rows) and rows[end + 1][0] == rows[end][0] + 1:
+            end += 1
+        first_row, last_row = rows[start][0], rows[end][0]
+        for run in runs:
+            updates.append({
+                "range": f"{rowcol_to_a1(first_row, run[0])}:{rowcol_to_a1(last_row, run[-1])}",
+                "values": [[values[names[pos]] for pos in run] for _, values in rows[start:end + 1]],
+            })
+        start = end + 1
+    return updates
+
+
+def _size(item):
+    return len(json.dumps(item, default=str))
+
+
+def chunk_by_size(items, max_bytes=MAX_REQUEST_BYTES):
+    """Split items into consecutive chunks whose JSON payload stays under max_bytes."""
+    chunk, size = [], 0
+    for item in items:
+        item_size = _size(item)
+        if chunk and size + item_size > max_bytes:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(item)
+        size += item_size
+    if chunk:
+        yield chunk
@@ -0,0 +1,139 @@
+import datetime
+import pandas as pd
+from ..debug_util import debug, debug_df
+from ..trace import tracer, span
+from ..schema import FOOD_LOG, MASTER_TABLE, load_sheet
+from ..config import flag, window_since
+from ..nutrition import NUTRIENT_COLUMNS, FOOD_LOG_OUTPUT_COLUMNS
+from ..sheet_reader import PAGE_ROWS, read_pages, read_window
+from ..sheet_writer import row_block_ranges
+from ..write_plan import WritePlan, frame_lookup, run_plan, resume_pending
+
+verbose_safety = False # Set to True for production sheet check, then to False once confident
+
+# Master column -> the Food Log column summed into it
+SOURCE_COLUMNS = dict(zip(NUTRIENT_COLUMNS, [name for name, _ in FOOD_LOG_OUTPUT_COLUMNS]))
+DEFAULT_COLUMNS = ["Sat Fat (g)", "Fibre (g)", "Sugar (g)"]
+
+
+def parse_columns(text):
+    """Master columns named in a comma-separated list (case-insensitive), default Sat Fat / Fibre / Sugar."""
+    if not text or not str(text).strip():
+        return list(DEFAULT_COLUMNS)
+    known = {name.lower(): name for name in SOURCE_COLUMNS}
+    columns = []
+    for name in str(text).split(","):
+        name = name.strip()
+        if name.lower() not in known:
+            raise ValueError(f"Unknown backfill column {name!r}, expected some of: {', '.join(SOURCE_COLUMNS)}")
+        columns.append(known[name.lower()])
+    return list(dict.fromkeys(columns))
+
+
+def parse_date(text):
+    """dd/mm/YYYY setting as a Timestamp, or None when blank."""
+    if not text or not str(text).strip():
+        return None
+    return pd.Timestamp(datetime.datetime.strptime(str(text).strip(), "%d/%m/%Y"))
+
+
+def in_window(dates, start, end):
+    inside = dates.notna()
+    if start is not None:
+        inside &= dates >= start
+    if end is not None:
+        inside &= dates <= end
+    return inside
+
+
+def window_totals(pages, columns, start=None, end=None):
+    """Per-date sums of the Food Log columns feeding `columns`, over the rows inside the window.
+
+    Each page is aggregated with a single groupby over every requested column and
+    only the per-date partial sums are kept, so memory follows the window, not the
+    log. Blank nutrients count as zero.
+    """
+    sources = [SOURCE_COLUMNS[c] for c in columns]
+    partials = []
+    for page in pages:
+        page = page[in_window(page["Date"], start, end)]
+        if page.empty:
+            continue
+        values = page.reindex(columns=sources).fillna(0.0)
+        partials.append(values.groupby(page["Date"]).sum())
+    if not partials:
+        return pd.DataFrame(columns=columns, dtype=float)
+    totals = pd.concat(partials).groupby(level=0).sum()
+    totals.columns = columns
+    return totals
+
+
+def run(session, config):
+    """Backfill nutrient columns of the master table from the Food Log, for a window of dates.
+
+    BACKFILL_FROM / BACKFILL_TO (dd/mm/YYYY, inclusive, blank for open-ended) pick
+    the window and BACKFILL_COLUMNS the master columns (default Sat Fat / Fibre /
+    Sugar); without BACKFILL_FROM the window starts at SINCE / WINDOW_DAYS. Only
+    the rows of both sheets inside the window are read when they are in date
+    order; otherwise the Food Log is read in pages of PAGE_ROWS rows. Only the
+    master rows inside the window are written, in bounded batches.
+    """
+    dry_run = flag(config, "DRY_RUN")
+    if resume_pending(session, "backfill", dry_run):
+        return
+
+    # Other variables
+    food_log_url = config["FOOD_LOG_URL"]
+    food_log_url_sheet = config["FOOD_LOG_URL_SHEET"]
+    master_table_url = config["MASTER_TABLE_URL"]
+    master_table_url_sheet = config["MASTER_TABLE_URL_SHEET"]
+    columns = parse_columns(config.get("BACKFILL_COLUMNS"))
+    page_rows = int(config.get("PAGE_ROWS") or PAGE_ROWS)
+    start, end = parse_date(config.get("BACKFILL_FROM")), parse_date(config.get("BACKFILL_TO"))
+    if start is None and window_since(config) is not None:
+        start = pd.Timestamp(window_since(config))
+
+    #Debugger
+    debug("⚠️ Sheet name resolved from ENV:", food_log_url_sheet)
+    window = f"{start.strftime('%d/%m/%Y') if start is not None else 'start'} → {config.get('BACKFILL_TO') or 'end'}"
+    debug(f"🧮 Backfilling {', '.join(columns)} for {window}")
+
+    food_log_ws, master_table_ws = session.open([(food_log_url, food_log_url_sheet), (master_table_url, master_table_url_sheet)])
+
+    # With a window only its rows are read (see read_window); otherwise the master table (one row a day)
+    # is read whole and the Food Log is streamed page by page, as it is when it is not in date order
+    # (the schemas parse the nutrient columns to numbers and Date to real dates)
+    schema = {"Date": "date", **{SOURCE_COLUMNS[c]: FOOD_LOG[SOURCE_COLUMNS[c]] for c in columns}}
+    pages = lambda: read_pages(food_log_ws, schema, "Food Log", page_rows=page_rows)
+    if start is None and end is None:
+        master_table = session.fetch({"master_table": lambda: load_sheet(master_table_ws, MASTER_TABLE, "Master Table")})["master_table"]
+        with span("read food log pages"):
+            totals = window_totals(pages(), columns)
+    else:
+        # (an unsorted Food Log is paged to the end, keeping only the rows inside the window:
+        # a row anywhere below can still be dated inside it)
+        inside_pages = lambda: pd.concat([page[in_window(page["Date"], start, end)] for page in pages()] or [pd.DataFrame(columns=list(schema))])
+        fetched = session.fetch({
+            "master_table": lambda: read_window(master_table_ws, MASTER_TABLE, "Master Table", start, end),
+            "food_log": lambda: read_window(food_log_ws, schema, "Food Log", start, end, whole=inside_pages),
+        })
+        master_table = fetched["master_table"]
+        with span("read food log window"):
+            totals = window_totals([fetched["food_log"]], columns, start, end)
+    before = frame_lookup(master_table)  # what the sheet shows now, for the write plan
+    debug_df(totals)
+
+    # Only the master rows inside the window, in batches of at most page_rows rows
+    inside = in_window(master_table["Date"], start, end)
+    values = totals.reindex(master_table.loc[inside, "Date"]).fillna(0).values.tolist()
+    rows = [(i + 2, dict(zip(columns, row))) for i, row in zip(master_table.index[inside], values)]  # +2 => header row + 1-based
+    updates = []
+    for batch in range(0, len(rows), page_rows):
+        updates.extend(row_block_ranges(list(master_table.columns), rows[batch:batch + page_rows], columns))
+
+    plan = WritePlan("backfill")
+    plan.update((master_table_url, master_table_url_sheet), updates, before=before)
+    with span("write master backfill"):
+        run_plan(session, plan, dry_run)
+    print(f"🧮 Backfill: {len(rows)} master rows ({window}) updated in {len(updates)} ranges")
+    tracer.record(backfill_rows=len(rows), backfill_ranges=len(updates))
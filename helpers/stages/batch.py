@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import traceback
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from ..debug_util import debug
+from ..config import CONFIG_KEYS, load_config, check_safety
+from ..checkpoint import state_path
+from ..quota import READ_LIMITER
+from ..session import open_session
+from ..trace import tracer
+from .pipeline import run_pipeline, safety_on
+
+# Settings that point at one person's sheets; a profile never inherits them from the environment
+SHEET_KEYS = [key for key in CONFIG_KEYS if key.endswith("_URL") or key.endswith("_URL_SHEET")]
+
+
+def load_manifest(path):
+    """Profiles from a JSON manifest: {"defaults": {...}, "profiles": {name: {...}}}.
+
+    Each profile is the defaults overlaid with its own settings, which are config
+    keys (sheet URLs and names, and optionally KEY_FILE_NAME for its own credentials).
+    """
+    with open(path) as f:
+        manifest = json.load(f)
+    defaults = manifest.get("defaults", {})
+    profiles = {}
+    for name, settings in manifest["profiles"].items():
+        settings = dict(defaults, **settings)
+        unknown = sorted(set(settings) - set(CONFIG_KEYS))
+        if unknown:
+            raise ValueError(f"Profile {name!r} has unknown settings: {', '.join(unknown)}")
+        profiles[name] = {key: str(value) for key, value in settings.items()}
+    return profiles
+
+
+@contextlib.contextmanager
+def profile_environ(settings):
+    """Environment for one profile: its settings on top of the batch's, without the batch's sheets."""
+    saved = dict(os.environ)
+    for key in SHEET_KEYS:
+        os.environ.pop(key, None)
+    os.environ.update(settings)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+
+def run_profile(name, settings, state_root, backfill=False):
+    """Run every stage for one profile, in its own STATE_DIR, logging to <STATE_DIR>/run.log.
+
+    Any failure is caught and reported, so one broken tracker does not stop the others.
+    """
+    state_dir = os.path.join(state_root, name)
+    os.makedirs(state_dir, exist_ok=True)
+    environ = dict(settings, STATE_DIR=state_dir, FOOD_DATA_CACHE_DIR=os.path.join(state_root, "shared"))
+    result = {"name": name, "state_dir": state_dir}
+    start = time.perf_counter()
+    with profile_environ(environ), open(os.path.join(state_dir, "run.log"), "w") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        tracer.reset()
+        try:
+            config = load_config()
+            check_safety(config, safety_on())
+            run_pipeline(open_session(config), config, backfill=backfill)
+            result["status"] = "ok"
+        except (Exception, SystemExit) as e:  # SystemExit: the shifted-row check aborts with sys.exit
+            traceback.print_exc()
+            result["status"] = "failed"
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["report"] = tracer.report()
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _init_worker(workers):
+    # All processes read through the same service account, so they split its read quota
+    READ_LIMITER.share(workers)
+
+
+def run_batch(profiles, state_root, workers=2, backfill=False):
+    """Run the profiles across a pool of `workers` processes; returns the results in manifest order.
+
+    The first profile of each Food Data catalogue runs ahead of the others, so the
+    ones sharing it find the catalogue in the shared cache instead of downloading it too.
+    """
+    catalogues = {}
+    for name, settings in profiles.items():
+        catalogues.setdefault((settings.get("FOOD_DATA_URL"), settings.get("FOOD_DATA_URL_SHEET")), name)
+    first = [name for name in profiles if name in catalogues.values()]
+    rest = [name for name in profiles if name not in first]
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(workers,)) as pool:
+        for wave in (first, rest):
+            futures = {name: pool.submit(run_profile, name, profiles[name], state_root, backfill) for name in wave}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:  # the worker process itself died
+                    results[name] = {"name": name, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+                debug(f"{'✅' if results[name]['status'] == 'ok' else '❌'} {name}: {results[name]['status']}")
+    return [results[name] for name in profiles]
+
+
+
+def write_batch_report(results, started):
+    """Write the combined report of a batch (BATCH_REPORT, default .state/batch_report.json); returns the path.
+
+    It has its own setting so it does not overwrite the single-run report (RUN_REPORT), nor the other way round.
+    """
+    report = {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(started)),
+        "seconds": round(time.time() - started, 4),
+        "profiles": results,
+    }
+    path = os.environ.get("BATCH_REPORT") or state_path("batch_report.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
@@ -0,0 +1,248 @@
+import sys
+import pandas as pd
+from ..debug_util import debug, debug_df
+from ..config import flag, window_since
+from ..trace import tracer, span
+from ..nutrition import FOOD_LOG_OUTPUT_COLUMNS, compute_nutrition, daily_totals
+from ..sheet_writer import changed_ranges, count_cells, row_block_ranges
+from ..write_plan import WritePlan, frame_lookup, run_plan, resume_pending
+from ..food_cache import load_food_data
+from ..food_names import FUZZY_CUTOFF, resolve_food_ids, print_name_report
+from ..schema import FOOD_LOG, MASTER_TABLE, parse_frame
+from ..sheet_reader import read_window
+from ..quota import READ_LIMITER, with_backoff
+from ..checkpoint import state_path, load_state, fingerprint_food_data, fingerprint_food_log, plan_incremental, build_state, split_state
+
+verbose_safety = False # Set to True for production sheet check, then to False once confident
+
+
+def sheet_value(value):
+    """Master table cell value: '' for NaN so we don't write the string "nan", dd/mm/YYYY for dates."""
+    if pd.isna(value):
+        return ''
+    elif type(value) == pd.Timestamp:
+        return value.strftime('%d/%m/%Y')
+    return value
+
+
+def run(session, config):
+    """Fill the Food Log nutrition cells and push the daily totals into the master table.
+
+    Every write goes into a write plan executed at the end. A plan an interrupted
+    run left unfinished is completed first instead of recomputing anything.
+    Returns the master table as it reads back after this run's writes, so the next
+    stage can use it without downloading it again (None after resuming a plan).
+
+    With SINCE / WINDOW_DAYS set only the Food Log and master rows dated from
+    then on are read (see read_window) and recomputed; earlier dates are left as
+    they are. The master table handed back then only holds those rows.
+    """
+    # Other variables
+    dry_run = flag(config, "DRY_RUN") # Build and show the write plan without writing anything
+    if resume_pending(session, "nutrition", dry_run):
+        return None
+    incremental = flag(config, "INCREMENTAL") # Recompute only new/changed Food Log rows
+    refresh_food_data = flag(config, "FOOD_DATA_REFRESH") # Bypass the local Food Data cache
+    food_data_url = config["FOOD_DATA_URL"]
+    food_data_url_sheet = config["FOOD_DATA_URL_SHEET"]
+    recipes_sheet = config.get("RECIPES_SHEET") or None # Worksheet of recipes next to Food Data (optional)
+    match_cutoff = float(config.get("FOOD_MATCH_CUTOFF") or FUZZY_CUTOFF) # How close a misspelt Food name must be to match
+    food_log_url = config["FOOD_LOG_URL"]
+    food_log_url_sheet = config["FOOD_LOG_URL_SHEET"]
+    master_table_url = config["MASTER_TABLE_URL"]
+    master_table_url_sheet = config["MASTER_TABLE_URL_SHEET"]
+    since = window_since(config) # First date to read and recompute (None: the whole history)
+
+    # Open the sheets (all spreadsheets' metadata is fetched at the same time)
+    debug("🧪 FOOD_DATA_URL from .env:", food_data_url)
+    food_log_ws, master_table_ws = session.open(
+        [(food_log_url, food_log_url_sheet), (master_table_url, master_table_url_sheet)], workbooks=[food_data_url])
+    food_data_spreadsheet = session.workbook(food_data_url)
+
+    #Debugger (the title listing is a metadata call, so it only runs when debug output is on)
+    debug("📋 Sheet titles found:", lambda: [ws.title for ws in food_data_spreadsheet.worksheets()])
+    debug("🧪 Target sheet from env var:", repr(food_data_url_sheet))
+    debug("⚠️ Sheet name resolved from ENV:", food_log_url_sheet)
+
+    # Load into DataFrames, all three sheets at once (Food Data comes from the local cache unless the sheet changed)
+    reads = {"food_data": lambda: load_food_data(
+        food_data_spreadsheet, food_data_url, food_data_url_sheet, refresh=refresh_food_data, recipes_sheet=recipes_sheet)}
+    if since is None:
+        reads["food_log"] = lambda: with_backoff(food_log_ws.get_all_records, limiter=READ_LIMITER)
+        reads["master_table"] = lambda: with_backoff(master_table_ws.get_all_records, limiter=READ_LIMITER)
+    else:
+        # Only the rows dated since then (the master table is kept as read, for the hand-over)
+        debug(f"📅 Window: dates from {since:%d/%m/%Y}")
+        reads["food_log"] = lambda: read_window(food_log_ws, {}, "Food Log", since)
+        reads["master_table"] = lambda: read_window(master_table_ws, {}, "Master Table", since)
+    fetched = session.fetch(reads)
+    food_data, food_index, name_index = fetched["food_data"]
+    # Each column is parsed once by its sheet schema (the master table is also kept as read, for the hand-over)
+    with span("parse"):
+        food_log = parse_frame(pd.DataFrame(fetched["food_log"]), FOOD_LOG, "Food Log")
+        master_records = pd.DataFrame(fetched["master_table"])
+        master_rows = fetched["master_table"].attrs["sheet_rows"] if since is not None else len(master_records)
+        master_table = parse_frame(master_records, MASTER_TABLE, "Master Table")
+
+    # Rows without a valid Food_Data_ID are matched by Food/Alias name, every distinct name once
+    with span("resolve names"):
+        food_log["Food_Data_ID"], name_report = resolve_food_ids(food_log, food_index, name_index, match_cutoff)
+    print_name_report(name_report)
+    tracer.record(names_matched=name_report["matched"],
+                  names_ambiguous=len(name_report["ambiguous"]), names_unmatched=len(name_report["unmatched"]))
+
+    # debug_df(food_data)
+    # debug_df(food_log)
+    # debug_df(master_table)    
+
+    master_records.columns = master_records.columns.str.strip()
+    master_written = master_records.astype(object)  # the master table as it will read back after this run
+
+    # Incremental mode: only rows that are new or changed since the last run (plus their dates) are recomputed
+    if incremental:
+        state_file = state_path("food_log_state.json")
+        food_hashes = fingerprint_food_data(food_index)
+        row_hashes = fingerprint_food_log(food_log, food_hashes)
+        state = load_state(state_file)
+        if since is not None:
+            # (rows dated before the window were not read: they are kept for the next run, not compared)
+            state, kept_rows = split_state(state, since)
+        dirty, touched_dates = plan_incremental(food_log, row_hashes, food_hashes, state)
+        in_scope = food_log["Date"].astype(str).str.strip().isin(touched_dates)
+        print(f"🔁 Incremental run: {dirty.sum()} new/changed rows across {len(touched_dates)} dates")
+    else:
+        dirty = pd.Series(True, index=food_log.index)
+        in_scope = dirty
+    scoped_log = food_log[in_scope]
+
+    # Compute every row in one indexed pass against Food Data
+    with span("compute"):
+        nutrition_to_append, records = compute_nutrition(scoped_log, food_index=food_index)
+
+    # Match the length of the final append with the initial one to ensure no shifting rows
+    debug(f"Length of nutrition list to append:",len(nutrition_to_append))
+    debug(f"Length of food log:",len(scoped_log))
+    if not len(nutrition_to_append) == len(scoped_log):
+        debug("❌ Different lengths between arrays. Potential shifted rows. Aborting mission.")
+        sys.exit(1)
+    debug(f"Nutrition to append:", nutrition_to_append)
+
+    # Update the Food Log: compare with what the sheet already shows and send only the changed cells,
+    # merged into as few rectangular ranges as possible, in one batch request
+    names = [name for name, _ in FOOD_LOG_OUTPUT_COLUMNS]
+    columns = [col for _, col in FOOD_LOG_OUTPUT_COLUMNS]
+    existing = scoped_log.reindex(columns=names).astype(object).where(lambda df: df.notna(), '')
+    to_check = dirty[in_scope].values  # incremental mode only looks at new/changed rows
+    food_log_updates = changed_ranges(
+        [ws_row for ws_row, d in zip(scoped_log.index + 2, to_check) if d],  # +2 => header row + 1-based
+        columns,
+        [old for old, d in zip(existing.values.tolist(), to_check) if d],
+        [new[:len(columns)] for new, d in zip(nutrition_to_append, to_check) if d],
+    )
+    plan = WritePlan("nutrition")
+    plan.update((food_log_url, food_log_url_sheet), food_log_updates, before=frame_lookup(food_log))
+    print(f"✍️ Food Log: {count_cells(food_log_updates)} cells written in {len(food_log_updates)} ranges")
+    tracer.record(food_log_cells=count_cells(food_log_updates), food_log_ranges=len(food_log_updates))
+
+    # Group by date
+    debug(records)
+
+    current_df = pd.DataFrame(master_table)
+    debug_df(current_df)
+    debug_df(records)
+
+    with span("daily totals"):
+        new_df = daily_totals(records)
+
+    debug_df(new_df)
+    debug(new_df)
+
+    current_df['Kcal'] = current_df['Kcal'].round(0)
+
+    new_df['Kcal'] = pd.to_numeric(new_df['Kcal'], errors='coerce').round(0)
+
+    merged = new_df.merge(current_df[['Date','Kcal']].rename(columns={'Kcal':'Kcal_cur'}),
+                          on='Date', how='left')
+    debug(merged)                                                    
+
+    k_new = merged['Kcal']
+    k_cur = merged['Kcal_cur']
+
+    mask_new    = k_cur.isna()                     # Date not present => INSERT
+    mask_same   = (~mask_new) & (k_new == k_cur)   # Date present & same Kcal => SKIP
+    mask_update = (~mask_new) & (k_new != k_cur)   # Date present & different Kcal => UPDATE
+
+    debug(f"Mask_new:", mask_new)
+    debug(f"Mask_update:", mask_update)
+    cols = ['Date', 'Kcal', 'Protein (g)', 'Carb (g)', 'Fat (g)', 'Sat Fat (g)', 'Fibre (g)', 'Sugar (g)']
+
+    to_insert = new_df.loc[mask_new, cols].copy()
+    to_update = new_df.loc[mask_update, cols].copy()
+    debug(f"To_insert:", to_insert)
+    debug(f"To_update:", to_update)
+
+    # --- read header from the sheet so we can place values in the correct columns
+    header = master_table_ws.row_values(1)  # row 1 is header
+    # map header name -> 1-based column index
+    col_idx = {name: i+1 for i, name in enumerate(header)}
+
+    # --- build Date -> sheet row map for UPDATEs
+    # use your existing current_df (already coerced)
+    dated = current_df[current_df['Date'].notna()]  # (indexed by sheet row - 2, also for a window)
+    date_to_row = dict(zip(dated['Date'], dated.index + 2))  # +2 => header row + 1-based
+    debug(date_to_row)
+    # ==============================
+    # UPDATE: write ONLY the columns in `cols`, one range per block of adjacent
+    # header columns and consecutive sheet rows (not one range per cell)
+    # ==============================
+    # write each selected column (skip ones missing from the sheet header)
+    present = [c for c in cols if c in col_idx]
+    to_update = to_update[to_update['Date'].isin(date_to_row.keys())]
+    ws_rows = [date_to_row[dt] for dt in to_update['Date']]
+    update_vals = [[sheet_value(v) for v in row] for row in to_update[present].to_numpy().tolist()]
+    row_updates = [(ws_row, dict(zip(present, row))) for ws_row, row in zip(ws_rows, update_vals)]  # (sheet row, {column: value}) for every changed date
+    if row_updates:
+        master_written.loc[[ws_row - 2 for ws_row in ws_rows], present] = update_vals
+
+    updates = row_block_ranges(header, row_updates, cols)
+    debug(updates)
+    plan.update((master_table_url, master_table_url_sheet), updates, value_input_option='USER_ENTERED',
+                before=frame_lookup(master_records))
+    debug(f"Master table: {len(row_updates)} rows updated in {len(updates)} ranges")
+
+    # ==============================
+    # INSERT: append rows with your `cols` only,
+    # fill non-selected columns with '' (blank) so Notes etc are untouched later
+    # ==============================
+    if not to_insert.empty:
+        full_rows = []
+        for row in to_insert[present].to_numpy().tolist():
+            # start with blanks for the whole header, then put values ONLY for the columns you care about
+            row_vals = [''] * len(header)
+            for c, value in zip(present, row):
+                row_vals[col_idx[c] - 1] = sheet_value(value)
+            full_rows.append(row_vals)
+
+        # append in size-capped chunks after the last row read (no NaNs, only blanks where you didn't provide data)
+        # USER_ENTERED will let numbers be numbers; change if you need RAW
+        plan.append((master_table_url, master_table_url_sheet), full_rows, start_row=master_rows + 2,
+                    value_input_option='USER_ENTERED')
+        appended = pd.DataFrame([dict(zip(header, row)) for row in full_rows],
+                                index=pd.RangeIndex(master_rows, master_rows + len(full_rows))).astype(object)
+        master_written = pd.concat([master_written, appended])
+
+    # Checkpoint only once every write has gone through
+    if incremental:
+        new_state = build_state(food_log, row_hashes, food_hashes)
+        if since is not None:
+            for h, entry in kept_rows.items():
+                new_state["rows"].setdefault(h, entry)
+        plan.save_after(state_file, new_state)
+    with span("write"):
+        run_plan(session, plan, dry_run)
+
+    print(f"Inserts: {len(to_insert)} | Updates: {len(to_update)} | Skips: {mask_same.sum()}")
+    tracer.record(master_inserts=len(to_insert), master_updates=len(to_update), master_skips=int(mask_same.sum()))
+    session.frames["master_table"] = master_written
+    return master_written
+
@@ -0,0 +1,27 @@
+from ..debug_util import debug
+from ..trace import span
+from . import nutrition, tactical
+from . import backfill as backfill_stage
+
+
+def safety_on():
+    """True when any stage has its production-sheet check switched on."""
+    return nutrition.verbose_safety or tactical.verbose_safety or backfill_stage.verbose_safety
+
+
+def run_pipeline(session, config, backfill=False):
+    """Run the nutrition update, the optional backfill and the Tactical DB build in one process."""
+    # Nutrition update: hands back the master table as it now reads in the sheet
+    with span("nutrition"):
+        master_table = nutrition.run(session, config)
+
+    # Backfill rewrites Sat Fat / Fibre / Sugar, so the tactical stage re-reads the master table after it
+    if backfill:
+        with span("backfill"):
+            backfill_stage.run(session, config)
+        master_table = None
+
+    with span("tactical"):
+        tactical.run(session, config, master_table=master_table)
+    debug("📊 Sheet API usage:", session.backend.report())
+
@@ -0,0 +1,216 @@
+import datetime
+import pandas as pd
+from ..debug_util import debug, debug_df
+from ..config import flag, window_since
+from ..checkpoint import state_path, load_state
+from ..cycle import CYCLE_COLUMNS, PHASE_ORDER, resume_cycle, stream_cycle, forecast_cycle
+from ..publisher import publish_frame
+from ..write_plan import WritePlan, run_plan, resume_pending
+from ..archive import write_archive, read_archive, archive_extent, hot_window
+from ..sheet_reader import read_window
+from ..quota import READ_LIMITER, with_backoff
+from ..activity import add_sleep_features, add_activity_metrics
+from ..schema import MASTER_TABLE, ACTIVITY_LOG, parse_frame, widen_floats
+from ..trace import tracer, span
+
+verbose_safety = False # Set to True for production sheet check, then to False once confident
+
+
+def _archived_history(since):
+    """Archived days before since, or None when the archive cannot stand in for them."""
+    extent = archive_extent()
+    if extent is None or extent[1]:  # (rows without a Date cannot be placed before or after the window)
+        debug("🗄️ No usable Tactical DB archive, reading the whole history")
+        return None
+    history = read_archive(end=since - datetime.timedelta(days=1))
+    history["First mens day"] = history["First mens day"].astype(bool)
+    return history
+
+
+def _cycle_state(history, boundary):
+    """stream_cycle state after the last archived day, so the window continues its cycle.
+
+    The archive keeps Phase forward-filled; the phase as entered (which decides a
+    first menstrual day) comes from that day's master row, `boundary`.
+    """
+    if history.empty:
+        return None
+    last = history.iloc[-1]
+    menstruation = None if pd.isna(last["Menstruation"]) else last["Menstruation"]
+    entered = boundary["Phase"].iloc[0] if len(boundary) and "Phase" in boundary.columns else None
+    return {
+        "cycle_no": int(last["Cycle No."]),
+        "cycle_day": int(last["Cycle_Day"]),
+        "last_phase": "Menstrual" if menstruation == "Y" else (None if pd.isna(entered) else entered),
+        "last_menstruation": menstruation,
+        "phase": None if pd.isna(last["Phase"]) else last["Phase"],
+    }
+
+
+def run(session, config, master_table=None):
+    """Rebuild the Tactical DB from the master table and the Activity Log.
+
+    master_table can be handed over by the nutrition stage of the same run;
+    otherwise it is read from the sheet. Like the nutrition stage, it finishes a
+    write plan left over from an interrupted run before anything else.
+
+    With SINCE / WINDOW_DAYS set, the days before the window come from the local
+    archive and only the Activity Log and master rows from then on are read (the
+    archive must reach the last sheet day before the window, else everything is
+    read as usual). The cycle count continues from the last archived day.
+    """
+    dry_run = flag(config, "DRY_RUN")
+    if resume_pending(session, "tactical", dry_run):
+        return None
+    # Other variables
+    master_table_url = config["MASTER_TABLE_URL"]
+    master_table_url_sheet = config["MASTER_TABLE_URL_SHEET"]
+    activity_log_url = config["ACTIVITY_LOG_URL"]
+    activity_log_url_sheet = config["ACTIVITY_LOG_URL_SHEET"]
+    tactical_db_url = config["TACTICAL_DB_URL"]
+    tactical_db_url_sheet = config["TACTICAL_DB_URL_SHEET"]
+    since = window_since(config)
+    history = _archived_history(since) if since is not None else None
+    if since is not None and master_table is not None:
+        debug("📅 Window run: the handed-over master table only holds the window, reading it again")
+        master_table = None
+
+    sheets = [(activity_log_url, activity_log_url_sheet), (tactical_db_url, tactical_db_url_sheet)]
+    if master_table is None:
+        sheets.append((master_table_url, master_table_url_sheet))
+    # (the Tactical DB is opened with the others; the write plan writes to it at the end)
+    activity_log_ws, tactical_db_ws, *master_table_ws = session.open(sheets)
+
+    # Window: the days from `since`, plus the master row of the last archived day (for its phase)
+    if history is not None:
+        boundary_date = history["Date"].iloc[-1] if len(history) else None
+        fetched = session.fetch({
+            "activity_log": lambda: read_window(activity_log_ws, {}, "Activity Log", since),
+            "master_table": lambda: read_window(master_table_ws[0], {}, "Master Table", since if boundary_date is None else boundary_date),
+        })
+        if fetched["activity_log"].attrs["previous_date"] != boundary_date:
+            debug(f"🗄️ The archive stops at {boundary_date}, not the last Activity Log day before the window; reading everything")
+            history = None
+
+    # Load into DataFrames, concurrently (reuse the master table from the nutrition stage when we have it)
+    if history is None:
+        reads = {"activity_log": lambda: with_backoff(activity_log_ws.get_all_records, limiter=READ_LIMITER)}
+        if master_table is None:
+            reads["master_table"] = lambda: with_backoff(master_table_ws[0].get_all_records, limiter=READ_LIMITER)
+        else:
+            debug("♻️ Using the master table handed over by the nutrition stage")
+        fetched = session.fetch(reads)
+    if master_table is None:
+        master_table = pd.DataFrame(fetched["master_table"])
+    activity_log = pd.DataFrame(fetched["activity_log"])
+
+    # Drop rows that are entirely NA/blank
+    master_table = master_table.dropna(axis=0, how="all")
+    activity_log = activity_log.dropna(axis=0, how="all")
+
+    # Parse each column once: trimmed headers, real dates, compact numbers, Steps with "k" expanded
+    with span("parse"):
+        master_table = parse_frame(master_table, MASTER_TABLE, "Master Table")
+        activity_log = parse_frame(activity_log, ACTIVITY_LOG, "Activity Log")
+
+    if history is not None:
+        boundary = master_table[master_table["Date"] == boundary_date]
+        master_table = master_table[master_table["Date"] >= pd.Timestamp(since)]
+        print(f"📅 Tactical DB: {len(history)} archived days before {since:%d/%m/%Y}, {len(activity_log)} days read")
+
+    debug_df(master_table)
+    debug_df(activity_log)
+
+    merged = master_table.merge(activity_log, on='Date', how='right').drop(['ID'], axis=1)
+    debug(merged)
+    debug_df(merged)  
+
+    # Cycle phases (Menstrual / Follicular marking, Cycle No., forward-filled Phase, Cycle_Day).
+    # Incremental mode continues from the saved cycle state and only processes the days added since.
+    incremental = flag(config, "INCREMENTAL")
+    cycle_file = state_path("cycle_state.json")
+    with span("cycles"):
+        if history is None:
+            cycles, cycle_checkpoint = resume_cycle(merged, load_state(cycle_file) if incremental else None)
+        else:
+            # (the saved checkpoint covers the whole history, so it is left for the next full run)
+            inputs = merged.reindex(columns=["Menstruation", "Phase"])
+            cycles, cycle_checkpoint = stream_cycle(inputs["Menstruation"], inputs["Phase"], _cycle_state(history, boundary))
+            cycles["First mens day"] = cycles["First mens day"].astype(bool)
+    merged["Phase"] = cycles["Phase"]
+    merged["First mens day"] = cycles["First mens day"]
+    merged["Cycle No."] = cycles["Cycle No."]
+
+    # Phase ID and days
+    merged["Phase_ID"] = merged["Phase"].map(PHASE_ORDER)
+    merged["Cycle_Day"] = cycles["Cycle_Day"]
+
+    # Load-bearing change ✅ to Y
+    merged.loc[merged["Load-bearing"].isin(["✅", "y", "hip mobility"]), "Load-bearing"] = "Y"
+
+    debug(lambda: merged.tail(10))
+
+    # Window: the archived days go in front, so the day before the window gets its sleep from the first one
+    if history is not None:
+        # (float32 columns are widened first, as the archive holds them, so 16.3 does not become 16.299999237060547)
+        merged = pd.concat([history.reindex(columns=merged.columns), widen_floats(merged)], ignore_index=True)
+        cycles = merged[CYCLE_COLUMNS]
+
+    # Bedtime / Wake-up time clean-up, Bedtime_clean and Sleep_duration (the next day's wake-up time minus bedtime)
+    with span("sleep"):
+        add_sleep_features(merged)
+    debug(lambda: merged.tail(10))
+
+    # Transform Date to be datelike column
+    merged["Date"] = merged["Date"].dt.date
+
+    # #Data clean-up on poop-time
+    merged = merged.replace("-", "")
+
+    # Filter for LookerStudio
+    cycle_to_display = 4
+    max_cycle = merged["Cycle No."].max()
+    # merged["Include_Last4"] = False
+    # merged.loc[(merged["Cycle No."] > (max_cycle - cycle_to_display)), "Include_Last4"] = True
+
+    merged["Include_Last4"] = merged["Cycle No."] > (max_cycle - cycle_to_display)
+
+    # Derived metrics, after the existing columns: 7-day sleep debt and step average, load-bearing share per phase
+    add_activity_metrics(merged)
+
+    # Every computed day goes to the local archive (one partition per cycle) before the sheet
+    # is trimmed; with TACTICAL_HOT_CYCLES set, only the last N cycles stay in the Tactical DB
+    if not dry_run:
+        with span("archive"):
+            archived, unchanged = write_archive(merged)
+        tracer.record(archive_cycles_written=archived, archive_cycles_unchanged=unchanged)
+    hot_cycles = int(config.get("TACTICAL_HOT_CYCLES") or 0)
+    published = hot_window(merged, hot_cycles)
+    if len(published) < len(merged):
+        debug(f"🗄️ Publishing the last {hot_cycles} cycles ({len(published)} of {len(merged)} rows), the rest stays in the archive")
+
+    # Projected phases for the coming days, from the average of the recent cycles
+    forecast_days = int(config.get("TACTICAL_FORECAST_DAYS") or 0)
+    if forecast_days > 0:
+        forecast = forecast_cycle(merged["Date"], cycles, forecast_days)
+        forecast["Include_Last4"] = True
+        forecast["Forecast"] = True
+        published = pd.concat([published.assign(Forecast=False), forecast], ignore_index=True)
+        debug(f"🔮 Added {len(forecast)} forecast days")
+
+    # Print to GSheet (incremental mode only sends the rows that changed since the last publish)
+    snapshot_file = state_path("tactical_db_snapshot.json")
+    plan = WritePlan("tactical")
+    # (without a snapshot, the Date column tells how many rows an earlier publish left in the sheet)
+    sheet_rows = lambda: len(with_backoff(tactical_db_ws.get_values, "A2:A", limiter=READ_LIMITER))
+    written, ranges = publish_frame(plan, (tactical_db_url, tactical_db_url_sheet), published, snapshot_file,
+                                    incremental=incremental, sheet_rows=sheet_rows)
+    if history is None:
+        plan.save_after(cycle_file, cycle_checkpoint)
+    with span("write tactical db"):
+        run_plan(session, plan, dry_run)
+    print(f"✍️ Tactical DB: {written} cells written in {ranges} ranges")
+    tracer.record(tactical_rows=len(published), tactical_cells=written, tactical_ranges=ranges)
+    print("💕 Tactical DB updated 💕")
+    return published
+
@@ -0,0 +1,159 @@
+import json
+import time
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from ..debug_util import debug
+from ..quota import with_backoff
+from ..trace import tracer, span
+from . import nutrition, tactical
+
+# What a change to each spreadsheet means: "nutrition" reruns both stages, "tactical"
+# the Tactical DB only ("master" also drops the master table kept from the last run)
+WATCHED = [("FOOD_DATA_URL", "nutrition"), ("FOOD_LOG_URL", "nutrition"), ("MASTER_TABLE_URL", "master"),
+           ("ACTIVITY_LOG_URL", "tactical")]
+# What /run?stage= accepts ("nutrition" also rebuilds the Tactical DB, like "pipeline")
+TRIGGERS = ["pipeline", "nutrition", "tactical"]
+
+
+class Watcher:
+    """Keeps one session, the opened sheets and the last master table in memory and reruns stages on change.
+
+    Changes are spotted from each spreadsheet's modified time (one metadata call
+    per spreadsheet a poll), or requested through trigger(). The Food Data cache
+    and the incremental state stay in memory between runs (see food_cache and
+    checkpoint), so a run after logging a meal only reads the sheets and
+    recomputes the rows that changed.
+    """
+
+    def __init__(self, session, config):
+        self.session = session
+        self.config = config
+        self.requests = set()
+        self.wake = threading.Event()
+        self.lock = threading.Lock()
+        self.seen = {}
+        self.status = {"runs": 0, "last_run": None, "last_error": None, "stages": []}
+
+    def trigger(self, what="pipeline"):
+        """Ask for a run from another thread (the HTTP endpoint)."""
+        with self.lock:
+            self.requests.add(what)
+        self.wake.set()
+
+    def _modified(self):
+        times = {}
+        for key, _ in WATCHED:
+            url = self.config.get(key)
+            if url and url not in times:
+                times[url] = with_backoff(self.session.workbook(url).last_update_time)
+        return times
+
+    def changes(self):
+        """What changed since the last look: a subset of {"nutrition", "master", "tactical"}.
+
+        The modified times are taken before the run they start, so an edit made
+        while it runs is still seen at the next poll. The run's own writes are seen
+        too; the incremental run they cause finds nothing to write and settles.
+        """
+        times = self._modified()
+        changed = set()
+        for key, what in WATCHED:
+            url = self.config.get(key)
+            if url and url in self.seen and times[url] != self.seen[url]:
+                changed.add(what)
+        first = not self.seen
+        self.seen = times
+        return {"nutrition"} if first else changed
+
+    def run(self, changed):
+        """Rerun the stages a set of changes needs; returns the stages run."""
+        stages = []
+        if changed & {"master", "nutrition", "pipeline"}:
+            self.session.frames.pop("master_table", None)  # (the nutrition stage hands over a fresh one)
+        tracer.reset()
+        with span("watch run"):
+            if "nutrition" in changed or "pipeline" in changed:
+                with span("nutrition"):
+                    nutrition.run(self.session, self.config)
+                stages.append("nutrition")
+            if stages or changed & {"master", "tactical"}:
+                with span("tactical"):
+                    tactical.run(self.session, self.config, master_table=self.session.frames.get("master_table"))
+                stages.append("tactical")
+        tracer.write()
+        return stages
+
+    def step(self):
+        """One poll: run what changed or was requested, catching failures so the watch goes on."""
+        with self.lock:
+            requested, self.requests = self.requests, set()
+        try:
+            changed = self.changes() | requested
+            if not changed:
+                return []
+            print(f"👀 {time.strftime('%H:%M:%S')} changes: {', '.join(sorted(changed))}")
+            stages = self.run(changed)
+            self.status.update(runs=self.status["runs"] + 1, last_run=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                               last_error=None, stages=stages)
+            print(f"✅ Updated ({', '.join(stages)}) in {tracer.report()['seconds']:.1f}s")
+            return stages
+        except Exception as e:
+            # A half-done run leaves its write plan behind; the next run finishes it first
+            self.status.update(last_error=f"{type(e).__name__}: {e}")
+            print(f"❌ Watch run failed: {e}")
+            debug(traceback.format_exc())
+            self.seen = {}
+            return []
+
+    def loop(self, interval, max_runs=None):
+        """Poll every interval seconds (or as soon as a trigger comes in) until interrupted."""
+        while max_runs is None or self.status["runs"] < max_runs:
+            self.step()
+            self.wake.wait(interval)
+            self.wake.clear()
+
+
+def _handler(watcher):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code, payload, headers=()):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/status":
+                self._reply(200, watcher.status)
+            elif url.path == "/run":
+                # (a run writes to the sheets, so a link preview or crawler following a GET must not start one)
+                self._reply(405, {"error": "use POST /run"}, headers=[("Allow", "POST")])
+            else:
+                self._reply(404, {"error": "use POST /run or GET /status"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            what = parse_qs(url.query).get("stage", ["pipeline"])[0]
+            if url.path != "/run" or what not in TRIGGERS:
+                self._reply(400, {"error": f"use /run?stage=<{'|'.join(TRIGGERS)}>"})
+                return
+            watcher.trigger(what)
+            self._reply(202, {"queued": what})
+
+        def log_message(self, format, *args):
+            debug(f"🌐 {self.address_string()} {format % args}")
+    return Handler
+
+
+def serve(watcher, port, host="127.0.0.1"):
+    """Start the trigger endpoint in a background thread (POST /run[?stage=...], GET /status)."""
+    server = ThreadingHTTPServer((host, port), _handler(watcher))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🌐 Trigger endpoint on http://{host}:{server.server_address[1]}/run (POST)")
+    return server
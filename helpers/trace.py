@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from .checkpoint import state_path
+from .debug_util import debug
+
+
+def _delta(after, before):
+    return {op: n - before.get(op, 0) for op, n in after.items() if n != before.get(op, 0)}
+
+
+class Tracer:
+    """Timed spans and run counters, written out as a JSON run report.
+
+    Each span records its wall time and, once a backend is attached, the API
+    calls, cells and (with TRACE_BYTES) bytes it used. Spans running at the
+    same time in different threads (concurrent reads) each see the calls made
+    by the others too.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget the spans and counters recorded so far and restart the clock."""
+        self.spans = []
+        self.counters = {}
+        self.started = time.time()
+
+    def attach(self, backend):
+        self.backend = backend
+
+    def _usage(self):
+        return self.backend.report() if self.backend is not None else None
+
+    @contextmanager
+    def span(self, name):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        path = "/".join(stack + [name])
+        stack.append(name)
+        before = self._usage()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            entry = {"name": path, "seconds": round(seconds, 4)}
+            after = self._usage()
+            if after is not None:
+                for key in ("calls", "cells", "bytes"):
+                    used = _delta(after[key], before[key])
+                    if used:
+                        entry[key] = used
+            with self._lock:
+                self.spans.append(entry)
+            debug(lambda: f"⏱️ {path}: {seconds:.3f}s")
+
+    def inherit(self, func):
+        """func wrapped to run under the caller's current span, for use in worker threads."""
+        parent = list(getattr(self._local, "stack", None) or [])
+
+        def run(*args, **kwargs):
+            self._local.stack = list(parent)
+            return func(*args, **kwargs)
+        return run
+
+    def record(self, **counters):
+        """Add run-level numbers (rows inserted, cells written...) to the report."""
+        with self._lock:
+            self.counters.update(counters)
+
+    def report(self):
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+            "seconds": round(time.time() - self.started, 4),
+            "spans": self.spans,
+            "counters": self.counters,
+            "api": self._usage(),
+        }
+
+    def write(self, path=None):
+        """Write the run report (RUN_REPORT, default .state/run_report.json); returns the path."""
+        path = path or os.environ.get("RUN_REPORT") or state_path("run_report.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        debug(f"📈 Run report written to {path}")
+        return path
+
+
+# One tracer per process, shared by every stage
+tracer = Tracer()
+span = tracer.span
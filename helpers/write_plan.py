@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import pandas as pd
+from gspread.utils import a1_range_to_grid_range
+from .checkpoint import state_path, save_state
+from .sheet_writer import chunk_by_size, same_cell
+from .quota import with_backoff
+from .debug_util import debug
+
+PLAN_VERSION = 1
+# Ranges shown per chunk by describe()
+SHOWN_RANGES = 3
+
+
+def plan_path(stage, dry_run=False):
+    """Where a stage's write plan is kept (dry-run plans are never resumed)."""
+    return state_path(f"write_plan_{stage}{'.dry' if dry_run else ''}.json")
+
+
+def _json_value(value):
+    """numpy scalars as plain numbers, anything else (dates) as text."""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _done_path(path):
+    return path + ".done"
+
+
+def frame_lookup(frame):
+    """(sheet row, sheet column) -> value, for a frame read from a sheet with its header on row 1.
+
+    The frame is indexed by sheet row - 2, like load_sheet (a windowed read only holds some rows).
+    """
+    values = frame.astype(object).where(frame.notna(), "").values
+    positions = {label: i for i, label in enumerate(frame.index)}
+
+    def lookup(row, col):
+        i = positions.get(row - 2)
+        if i is not None and 1 <= col <= values.shape[1]:
+            return values[i][col - 1]
+        return ""
+    return lookup
+
+
+def _range_before(a1, values, lookup):
+    bounds = a1_range_to_grid_range(a1.split("!")[-1])
+    top, left = bounds.get("startRowIndex", 0) + 1, bounds.get("startColumnIndex", 0) + 1
+    return [[lookup(top + r, left + c) for c in range(len(row))] for r, row in enumerate(values)]
+
+
+def _clip(values, width=60):
+    text = json.dumps(values, default=_json_value, ensure_ascii=False)
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+
+class WritePlan:
+    """Every sheet write a stage is about to make, in order, cut into size-capped chunks.
+
+    Chunks name their worksheet by (url, sheet) so a saved plan can be executed by
+    a later process without anything being re-read or recomputed. Update chunks
+    keep the values the stage read in those cells (when it knows them), append
+    chunks the sheet row their first row must land on. State files the stage
+    would save after writing are kept too, and only saved once every chunk went
+    through.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.created = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.chunks = []
+        self.after = []  # [path, state] pairs
+
+    def _add(self, sheet, op, items, value_input_option, **extra):
+        for chunk in chunk_by_size(items):
+            self.chunks.append(dict(id=len(self.chunks), sheet=list(sheet), op=op, value_input_option=value_input_option,
+                                    data=chunk, **extra))
+
+    def update(self, sheet, updates, value_input_option=None, before=None):
+        """Plan batch_update calls; before(row, col) gives what the stage read in a cell."""
+        if before is not None:
+            updates = [dict(u, before=_range_before(u["range"], u["values"], before)) for u in updates]
+        self._add(sheet, "batch_update", updates, value_input_option)
+
+    def append(self, sheet, rows, start_row, value_input_option="RAW"):
+        """Plan append_rows calls for rows expected to land from sheet row start_row on."""
+        for chunk in chunk_by_size(rows):
+            self.chunks.append(dict(id=len(self.chunks), sheet=list(sheet), op="append_rows",
+                                    value_input_option=value_input_option, data=chunk, start_row=start_row))
+            start_row += len(chunk)
+
+    def frame(self, sheet, rows):
+        """Plan a full rewrite from A1 (header row first), like set_with_dataframe."""
+        self.chunks.append(dict(id=len(self.chunks), sheet=list(sheet), op="set_with_dataframe", value_input_option=None,
+                                data=rows))
+
+    def save_after(self, path, state):
+        self.after.append([path, state])
+
+    def cells(self):
+        def count(chunk):
+            if chunk["op"] == "batch_update":
+                return sum(len(row) for u in chunk["data"] for row in u["values"])
+            return sum(len(row) for row in chunk["data"])
+        return sum(count(c) for c in self.chunks)
+
+    # --- persistence
+    def to_dict(self):
+        return {"version": PLAN_VERSION, "stage": self.stage, "created": self.created, "chunks": self.chunks,
+                "after": self.after}
+
+    @classmethod
+    def from_dict(cls, payload):
+        plan = cls(payload["stage"])
+        plan.created, plan.chunks, plan.after = payload["created"], payload["chunks"], payload["after"]
+        return plan
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f, default=_json_value)
+        os.replace(tmp, path)
+        if os.path.exists(_done_path(path)):
+            os.remove(_done_path(path))
+
+    def describe(self):
+        """Readable summary of the plan, chunk by chunk."""
+        lines = [f"📝 {self.stage} write plan: {len(self.chunks)} chunks, {self.cells()} cells"]
+        for chunk in self.chunks:
+            sheet = " / ".join(chunk["sheet"])
+            if chunk["op"] == "batch_update":
+                lines.append(f"  #{chunk['id']} {sheet}: update {len(chunk['data'])} ranges")
+                for u in chunk["data"][:SHOWN_RANGES]:
+                    before = f"{_clip(u['before'])} → " if "before" in u else ""
+                    lines.append(f"      {u['range']}: {before}{_clip(u['values'])}")
+                if len(chunk["data"]) > SHOWN_RANGES:
+                    lines.append(f"      ... {len(chunk['data']) - SHOWN_RANGES} more ranges")
+            elif chunk["op"] == "append_rows":
+                lines.append(f"  #{chunk['id']} {sheet}: append {len(chunk['data'])} rows from row {chunk['start_row']}")
+            else:
+                lines.append(f"  #{chunk['id']} {sheet}: rewrite {len(chunk['data']) - 1} rows from A1")
+        for path, _ in self.after:
+            lines.append(f"  then save {path}")
+        return lines
+
+
+def load_plan(path):
+    """(plan, ids of chunks already applied) for an unfinished plan, or (None, None)."""
+    if not os.path.exists(path):
+        return None, None
+    with open(path) as f:
+        payload = json.load(f)
+    if payload.get("version") != PLAN_VERSION:
+        debug(f"♻️ Write plan {path} is from another version, ignoring it")
+        return None, None
+    done = set()
+    if os.path.exists(_done_path(path)):
+        with open(_done_path(path)) as f:
+            done = {int(line) for line in f if line.strip()}
+    return WritePlan.from_dict(payload), done
+
+
+def discard_plan(path):
+    for name in (path, _done_path(path)):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+def _reads_as(shown, value):
+    """Whether a cell showing `shown` holds the written value (6478 shows 6478.0 as "6478")."""
+    if isinstance(value, bool):
+        return str(shown).upper() == str(value).upper()
+    try:
+        return float(shown) == float(value)
+    except (TypeError, ValueError):
+        return same_cell(shown, value)
+
+
+def _already_appended(ws, chunk, stage):
+    """Whether an append interrupted last time had gone through, from its first target row."""
+    existing = with_backoff(ws.row_values, chunk["start_row"])
+    if not existing:
+        return False
+    first = chunk["data"][0]
+    if all(_reads_as(old, new) for old, new in zip(existing + [""] * len(first), first)):
+        return True
+    raise RuntimeError(f"🛑 Row {chunk['start_row']} of {' / '.join(chunk['sheet'])} is no longer where the plan "
+                       f"expected to append; run `tracker.py plan --discard {stage}` and rerun")
+
+
+def _send(ws, chunk):
+    if chunk["op"] == "batch_update":
+        data = [{"range": u["range"], "values": u["values"]} for u in chunk["data"]]
+        with_backoff(ws.batch_update, data, value_input_option=chunk["value_input_option"])
+    elif chunk["op"] == "append_rows":
+        with_backoff(ws.append_rows, chunk["data"], value_input_option=chunk["value_input_option"])
+    else:
+        header, *body = chunk["data"]
+        frame = pd.DataFrame(body, columns=header)
+        with_backoff(ws.set_with_dataframe, frame, row=1, col=1, include_column_header=True)
+
+
+def execute_plan(session, plan, path, done=None):
+    """Apply the chunks of a plan not yet in `done`, recording each one as it completes.
+
+    The plan is saved to path before anything is sent, so an interrupted run can be
+    resumed by the next one. When the first chunk left over from an earlier run is
+    an append, its target row is checked first so the rows are not appended twice.
+    Once every chunk is through, the plan's state files are saved and the plan is
+    removed. Returns the number of chunks sent.
+    """
+    resumed = done is not None
+    if not resumed:
+        done = set()
+        if plan.chunks:
+            plan.save(path)
+    pending = [c for c in plan.chunks if c["id"] not in done]
+    sent = 0
+    with open(_done_path(path), "a") as progress:
+        for n, chunk in enumerate(pending):
+            ws = session.worksheet(*chunk["sheet"])
+            if resumed and n == 0 and chunk["op"] == "append_rows" and _already_appended(ws, chunk, plan.stage):
+                debug(f"⏭️ Chunk #{chunk['id']} had been appended before the interruption")
+            else:
+                _send(ws, chunk)
+                sent += 1
+            progress.write(f"{chunk['id']}\n")
+            progress.flush()
+            os.fsync(progress.fileno())
+    for state_file, state in plan.after:
+        save_state(state_file, state)
+    discard_plan(path)
+    return sent
+
+
+def run_plan(session, plan, dry_run=False):
+    """Execute a stage's plan, or in a dry run save it next to the state files and print it."""
+    if dry_run:
+        path = plan_path(plan.stage, dry_run=True)
+        plan.save(path)
+        print("\n".join(plan.describe()))
+        print(f"🧪 Dry run: nothing written, plan saved to {path}")
+        return 0
+    sent = execute_plan(session, plan, plan_path(plan.stage))
+    debug(f"📝 {plan.stage}: {sent} write chunks sent")
+    return sent
+
+
+def resume_pending(session, stage, dry_run=False):
+    """Finish a plan an earlier run of this stage left half-applied; True when there was one."""
+    path = plan_path(stage)
+    plan, done = load_plan(path)
+    if plan is None:
+        return False
+    print(f"⏯️ Resuming the {stage} writes planned at {plan.created}: {len(done)} of {len(plan.chunks)} chunks were applied")
+    if dry_run:
+        print("\n".join(plan.describe()))
+        print("🧪 Dry run: the unfinished plan was not resumed")
+        return True
+    execute_plan(session, plan, path, done)
+    print(f"✅ {stage} writes completed")
+    return True
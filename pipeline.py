@@ -0,0 +1,6 @@
+import sys
+from helpers.cli import main
+
+# Same as `python tracker.py pipeline`; kept so existing schedules keep working
+if __name__ == "__main__":
+    sys.exit(main(["pipeline"] + sys.argv[1:]))